@@ -1,11 +1,12 @@
-import os
-import json
-from threading import Thread
+from types import MappingProxyType
+from typing import Callable
+from threading import Lock, Thread
 from collections import OrderedDict
 
-from .constants import DIRS
 from .helpers.process import format_traceback
-from .apis.asset_types import AssetList, AssetListItem
+from .helpers.library_status import library_status
+from .helpers.preview_manifest import preview_manifest
+from .apis.asset_types import AssetList, AssetListItem, AssetListChanges
 from .operators.op_report_message import report_message
 """
 The asset lists data structure works like this:
@@ -34,8 +35,28 @@ class AllAssetLists():
 
     asset_lists: OrderedDict[str, AssetList]
 
+    def defer_initialization(self, name: str, loader: Callable[[], AssetList | None]):
+        """Register a function that initializes the given asset list from its cached data.
+        It is only called once, either from a background thread, or when the list is first needed."""
+        self._pending_locks.setdefault(name, Lock())
+        self._pending[name] = loader
+
+    def load_pending(self, name: str = ""):
+        """Initialize the given asset list (or all of them) from the cache, if that has been deferred until now.
+        If it is already being initialized in another thread, wait for that to finish."""
+        names = [name] if name else list(self._pending_locks)
+        for name in names:
+            lock = self._pending_locks.get(name)
+            # Avoid waiting on the lock when there's nothing left to load
+            if lock is None or not (name in self._pending or lock.locked()):
+                continue
+            with lock:
+                if loader := self._pending.pop(name, None):
+                    loader()
+
     def is_initialized(self, name: str):
         """Check whether an asset list has been initialized with data yet, or if it still needs to be downloaded."""
+        self.load_pending(name)
         return isinstance(self.asset_lists[name], AssetList)
 
     @property
@@ -46,8 +67,13 @@ class AllAssetLists():
                 return False
         return True
 
-    def initialize_asset_list(self, name, data=None):
-        """Takes an asset list and initialises it with new data from the internet"""
+    def initialize_asset_list(self, name, data=None, validators: dict[str, str] = None):
+        """Takes an asset list and initialises it with new data from the internet,
+        or with the given data and validators if they have been loaded from the cache"""
+        if not data and (lock := self._pending_locks.get(name)):
+            # The new data replaces the cached data, so there's no need to load that anymore.
+            with lock:
+                self._pending.pop(name, None)
         asset_list = self.asset_lists[name]
 
         # if not data and not check_internet():
@@ -59,8 +85,10 @@ class AllAssetLists():
         #     return None
 
         # Get new data from the internet, from the get_data function
+        asset_list_data = data
         try:
-            asset_list_data = data or asset_list.get_data()
+            if not data:
+                asset_list_data, validators = asset_list.get_data()
         except Exception as e:
             report_message(
                 severity="ERROR",
@@ -70,36 +98,84 @@ class AllAssetLists():
             return None
 
         # Initialize
-        if self.is_initialized(asset_list.name):
+        if isinstance(asset_list, AssetList):
             asset_list = asset_list.__class__(asset_list_data)
         else:
             asset_list = asset_list(asset_list_data)
-        self.asset_lists[asset_list.name] = asset_list
         for item in dict(asset_list).values():
             if not item.ab_is_valid:
                 del asset_list.assets[item.ab_idname]
                 continue
             item.ab_asset_list = asset_list
+        asset_list.validators = dict(validators or {})
+        self[asset_list.name] = asset_list
 
         # Write the new cached data
-        # This is very slow, so only do it when needed to prevent long register times.
         if not data:
-            list_file = DIRS.cache / (asset_list.name + ".json")
-            with open(list_file, "w") as f:
-                json.dump(asset_list_data, f, indent=2)
+            asset_list.data_cache.write(asset_list_data, validators=asset_list.validators)
 
         return asset_list
 
-    def initialize_all(self, blocking: bool = True) -> list[Thread]:
+    def refresh_asset_list(self, name) -> AssetListChanges | None:
+        """Check an asset list for changes since it was last downloaded, and only update the assets that have changed,
+        rather than creating the whole list again. If the website supports it, a conditional request is used,
+        so that nothing is downloaded if nothing has changed.
+        Returns the changes, or None if the new data couldn't be downloaded."""
+        self.last_refresh[name] = None
+        if not self.is_initialized(name):
+            if self.initialize_asset_list(name) is None:
+                return None
+            changes = AssetListChanges(added=set(self.asset_lists[name].assets.keys()), full=True)
+            self.last_refresh[name] = changes
+            return changes
+
+        asset_list = self.asset_lists[name]
+        try:
+            data, validators = asset_list.get_data(validators=asset_list.validators)
+        except Exception as e:
+            report_message(
+                severity="ERROR",
+                message=f"Could not check asset list '{name}' for new assets due to error:\n{format_traceback(e)}",
+                main_thread=True,
+            )
+            return None
+
+        # Nothing has changed since the last download
+        if data is None:
+            self.last_refresh[name] = AssetListChanges()
+            return self.last_refresh[name]
+
+        with self._index_lock:
+            changes = asset_list.update(data)
+            all_assets = dict(self._all_assets)
+            for idname in changes.removed:
+                all_assets.pop(idname, None)
+            for idname in changes.added | changes.changed:
+                all_assets[idname] = asset_list.assets[idname]
+            self._set_index(all_assets)
+        library_status.invalidate()
+
+        asset_list.validators = dict(validators or {})
+        asset_list.data_cache.write(data, validators=asset_list.validators)
+        self.last_refresh[name] = changes
+        return changes
+
+    def refresh_all(self, blocking: bool = True) -> list[Thread]:
+        """Check all current asset lists for changes. The changes found for each list are stored in last_refresh.
+        If blocking is True, wait for it to finish, otherwise return the threads that are refreshing each asset list"""
+        return self.initialize_all(blocking=blocking, target=self.refresh_asset_list)
+
+    def initialize_all(self, blocking: bool = True, target: Callable = None) -> list[Thread]:
         """Initialize all current asset lists
         If blocking is True, wait for initialization to finish,
         otherwise return the threads that are initializing each asset list"""
+        target = target or self.initialize_asset_list
 
         # Initialize each one in a separate thread for performance.
         threads = []
         asset_lists = self.asset_lists.copy()
         for asset_list in asset_lists:
-            thread = Thread(target=self.initialize_asset_list, args=[asset_list])
+            thread = Thread(target=target, args=[asset_list])
             threads.append(thread)
             thread.name = asset_list
             thread.start()
@@ -111,39 +187,70 @@ class AllAssetLists():
             return threads
 
     def new_assets_available(self):
-        """Return the number of assets that still need to be downloaded"""
-        preview_names = {os.path.splitext(os.path.basename(p))[0] for p in os.listdir(DIRS.previews)}
-        asset_names = set(self.all_assets.keys())
-        difference = asset_names - preview_names
-        return len(difference)
+        """Return the number of assets whose previews still need to be downloaded"""
+        self.load_pending()
+        return len(preview_manifest.missing(self.all_assets.values()))
 
     def __init__(self):
         self.asset_lists = OrderedDict()
+        # An index of every asset in every list, keyed by idname, so that looking up assets during draw calls is
+        # cheap. It is never changed in place. Instead, a new one is swapped in when a list changes, so that other
+        # threads can iterate over it without taking the lock.
+        self._all_assets: dict[str, AssetListItem] = {}
+        self._all_assets_view = MappingProxyType(self._all_assets)
+        self._index_lock = Lock()
+        # Functions that initialize asset lists from their cached data, that haven't been called yet.
+        self._pending: dict[str, Callable[[], AssetList | None]] = {}
+        self._pending_locks: dict[str, Lock] = {}
+        # The changes found by the most recent refresh of each asset list (None if it failed)
+        self.last_refresh: dict[str, AssetListChanges | None] = {}
+
+    def _update_index(self, old_list: AssetList | type[AssetList], new_list: AssetList | type[AssetList]):
+        """Replace the entries of the old asset list in the all assets index with those of the new one.
+        Either can be an uninitialized asset list class, which has no assets."""
+        with self._index_lock:
+            all_assets = dict(self._all_assets)
+            if isinstance(old_list, AssetList):
+                for idname in old_list.assets:
+                    all_assets.pop(idname, None)
+            if isinstance(new_list, AssetList):
+                all_assets.update(new_list.assets)
+            self._set_index(all_assets)
+        library_status.invalidate()
+
+    def _set_index(self, all_assets: dict[str, AssetListItem]):
+        """Replace the all assets index. Must be called while holding the index lock."""
+        self._all_assets = all_assets
+        self._all_assets_view = MappingProxyType(all_assets)
 
     def __len__(self) -> int:
         return len(self.asset_lists)
 
     def __getitem__(self, key) -> AssetList:
+        self.load_pending(key)
         return self.asset_lists[key]
 
     def __setitem__(self, key, value):
+        self._update_index(self.asset_lists.get(key), value)
         self.asset_lists[key] = value
 
     def keys(self) -> set[AssetList]:
         return self.asset_lists.keys()
 
     def values(self) -> set[AssetList]:
+        self.load_pending()
         return self.asset_lists.values()
 
     def items(self) -> set[list[str, AssetList]]:
+        self.load_pending()
         return self.asset_lists.items()
 
     @property
-    def all_assets(self) -> OrderedDict[str, AssetListItem]:
-        all_assets = OrderedDict()
-        for asset_list in self.asset_lists.values():
-            all_assets.update(asset_list.assets)
-        return all_assets
+    def all_assets(self) -> MappingProxyType[str, AssetListItem]:
+        """A read only snapshot of every asset in every asset list, keyed by idname.
+        It doesn't change after it has been returned, so it is safe to iterate over from any thread."""
+        self.load_pending()
+        return self._all_assets_view
 
 
 asset_lists: AllAssetLists = AllAssetLists()
@@ -1,11 +1,12 @@
 import os
 import zipfile
 from pathlib import Path
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 
 from bpy.types import Context
 
-from ...helpers.process import new_blender_process
+from ...helpers.worker_pool import worker_pool
+from ...operators.op_report_message import report_message
 from ..asset_types import Asset
 from ..asset_types import AssetListItem as ACG_AssetListItem
 from ..asset_utils import (
@@ -41,10 +42,11 @@ class ACG_Asset(Asset):
     def get_download_size(self):
         return self.all_quality_data[self.quality_level]["size"]
 
-    def download_asset(self):
+    def download_asset(self, on_progress: Callable[[int], None] = None):
         file_name = f"{self.file_name}.{self.file_type}"
         url = f"https://ambientcg.com/get?file={file_name}"
-        file = download_file(url, self.download_dir, file_name)
+        size = self.quality_data.get("size", 0)
+        file = download_file(url, self.download_dir, file_name, size=size, on_progress=on_progress)
 
         # Unzip
         if self.file_type == "zip":
@@ -62,12 +64,13 @@ class ACG_Asset(Asset):
 
         # Set up a blend file for this asset
         if self.type == MODEL:
-            process = new_blender_process(
+            job = worker_pool.submit(
                 script=Path(__file__).parent / "scripts" / "acg_sc_setup_asset.py",
-                script_args=("--name", self.import_name, "--output_file", str(self.blend_file)),
-                use_stdout=False,
+                args=("--name", self.import_name, "--output_file", str(self.blend_file)),
             )
-            process.wait()
+            job.wait()
+            if job.failed:
+                report_message("ERROR", f"Error setting up Ambient CG asset blend file:\n{job.error_message}")
 
     def import_asset(self, context: Context):
         if self.type == HDRI:
@@ -1,10 +1,10 @@
 import csv
-from threading import Thread
 from collections import OrderedDict
 
-from ...vendor import requests
+from ...helpers.session import get_session
+from ...helpers.scheduler import Priority, scheduler
 from ..asset_types import AssetList
-from ..asset_utils import register_asset_list
+from ..asset_utils import conditional_headers, register_asset_list, response_validators
 from ...helpers.math import roundup
 from .acg_asset_list_item import ACG_AssetListItem
 
@@ -13,18 +13,25 @@ class ACG_AssetList(AssetList):
 
     name = "ambient_cg"
     label = "Ambient CG"
+    item_type = ACG_AssetListItem
     assets: OrderedDict[str, ACG_AssetListItem] = OrderedDict()
+    # Everything that the statisticsData include adds (see get_data), which can change between every request.
+    # Both the sub dict and the top level statistics fields are listed, so that either form is ignored.
+    volatile_keys = {"statisticsData", "downloadCount", "popularityScore"}
 
     url = "https://ambientcg.com/"
     support_url = "https://www.patreon.com/ambientCG"
     description = """A massive repository of CC0 assets created by Lennart Demmes""".replace("\n    ", "")
 
     @staticmethod
-    def get_data() -> dict:
+    def get_data(validators: dict[str, str] = None) -> tuple[dict | None, dict[str, str]]:
         """The Ambient CG api only allows us to get the data for 100 assets at a time,
-        so this sends enough requests to cover all of the assets, each in their own thread.
+        so this sends enough requests to cover all of the assets, which are run in parallel by the download scheduler.
         Idk if this undermines the point of the 100 limit in the first place,
-        but it's necessary to get all of the info needed for the addon to work"""
+        but it's necessary to get all of the info needed for the addon to work.
+
+        The downloads csv changes whenever an asset is added or updated, so it's used to check for changes,
+        before sending all of the other requests."""
 
         # All of the parameters that can be passed, the more that are passed, the slower the request
         params = [
@@ -41,23 +48,28 @@ class ACG_AssetList(AssetList):
             # "imageData",  # No, needed to be able to get the previews, but I think I can get them automatically
         ]
 
+        csv_url = "https://ambientcg.com/api/v2/downloads_csv"
+        csv_response = get_session().get(csv_url, stream=True, headers=conditional_headers(validators))
+        if csv_response.status_code == 304:
+            csv_response.close()
+            return None, validators
+        new_validators = response_validators(csv_response)
+
         base_url = "https://ambientcg.com/api/v2/full_json"
         url = f"{base_url}?include={','.join(params)}"
 
         # Get total number of assets
         initial_url = f"{base_url}?limit=5000"
-        result = requests.get(initial_url).json()
+        result = get_session().get(initial_url).json()
         total = result["numberOfResults"]
         page_size = int(result["searchQuery"]["limit"])
         # page_size = result["searchQuery"]["limit"]
 
         quality_data = {}
-        threads: list[Thread] = []
+        jobs = []
 
         def get_csv_data():
-            csv_url = "https://ambientcg.com/api/v2/downloads_csv"
-
-            with requests.get(csv_url, stream=True) as r:
+            with csv_response as r:
                 lines = (line.decode('utf-8') for line in r.iter_lines())
                 first = True
                 for row in csv.reader(lines):
@@ -68,43 +80,50 @@ class ACG_AssetList(AssetList):
                     levels[row[1]] = {"size": int(row[3]), "file_type": row[2]}
                     quality_data[row[0]] = levels
 
-        thread = Thread(target=get_csv_data)
-        thread.start()
-        threads.append(thread)
+        jobs.append(scheduler.submit(get_csv_data, priority=Priority.INTERACTIVE, group=ACG_AssetList.name))
 
         all_data = {}
 
         def get_asset_data(offset):
             """Send a request to get the info for 100 assets with the given offset (in number of assets)"""
             page_url = f"{url}&offset={offset}&limit={page_size}"
-            retval = requests.get(page_url).json()
+            retval = get_session().get(page_url).json()
             assets = {a["assetId"]: a for a in retval["foundAssets"]}
             all_data.update(assets)
 
-        # Iterate through the pages and start a new thread with the request
+        # Iterate through the pages and queue a request for each one
         for offset in range(roundup(total, page_size) // page_size):
-            thread = Thread(target=get_asset_data, args=[offset * page_size])
-            thread.start()
-            threads.append(thread)
-
-        # Wait till all threads have finished
-        for thread in threads:
-            thread.join()
+            job = scheduler.submit(
+                get_asset_data,
+                args=[offset * page_size],
+                priority=Priority.INTERACTIVE,
+                group=ACG_AssetList.name,
+                url=base_url,
+            )
+            jobs.append(job)
+
+        # Wait till all requests have finished
+        for job in jobs:
+            job.result()
 
         for name, data in quality_data.items():
             all_data[name]["quality_levels"] = data
 
-        return all_data
+        return all_data, new_validators
 
     def __init__(self, data: dict):
         self.assets = OrderedDict()
         # Only load assets that are supported
         # TODO: support more asset types (Terrain, Decals, Images, Atlasses etc.)
         for name, asset_info in data.items():
-            if asset_info["dataType"] in {"Material", "HDRI", "3DModel"}:
-                item = ACG_AssetListItem(name, asset_info)
+            if item := self.create_item(name, asset_info):
                 self.assets[item.ab_idname] = item
 
+    def create_item(self, name: str, data: dict) -> ACG_AssetListItem | None:
+        if data["dataType"] in {"Material", "HDRI", "3DModel"}:
+            return ACG_AssetListItem(name, data)
+        return None
+
 
 def register():
     register_asset_list(ACG_AssetList)
\ No newline at end of file
@@ -5,55 +5,73 @@ from traceback import format_exc
 from bpy.types import Material, Object, World
 
 from ...helpers.library import human_readable_file_size
-from ..asset_types import AssetListItem
+from ..asset_types import AssetListItem, memoised_property
 from ..asset_types import AssetMetadataItem as Metadata
 from ..asset_utils import HDRI, MATERIAL, MODEL, dimensions_to_string, download_file
 from .acg_asset import ACG_Asset
 
+ASSET_TYPES = {"HDRI": HDRI, "Material": MATERIAL, "3DModel": MODEL}
+BL_TYPES = {"HDRI": World, "Material": Material, "3DModel": Object}
+
 
 class ACG_AssetListItem(AssetListItem):
+
+    __slots__ = ("_ab_label", "_ab_categories", "_ab_metadata", "_ab_quality_levels")
+
     ab_asset_type = ACG_Asset
     ab_prefix = "acg"
     ab_authors = ["Lennart Demes"]
 
     def __init__(self, name: str, data: dict):
-        asset_types = {"HDRI": HDRI, "Material": MATERIAL, "3DModel": MODEL}
-        bl_types = {"HDRI": World, "Material": Material, "3DModel": Object}
-
-        # Necessary data
         self.ab_name = name
-        data_type = data["dataType"]
-        self.ab_type = asset_types[data_type]
-        self.ab_bl_type = bl_types[data_type]
-        self.ab_tags = data["tags"]
-        self.ab_categories = [t for t in self.ab_tags if t not in {"hdri", "3d"} and not re.match("\d+", t)]
-        # self.catalog_path = f"{names[data_type]}/{category}"
+        self.data = data
+
+    @property
+    def ab_is_valid(self):
+        # If no quality levels, asset is not valid
+        return "quality_levels" in self.data
+
+    @property
+    def ab_type(self):
+        return ASSET_TYPES[self.data["dataType"]]
+
+    @property
+    def ab_bl_type(self):
+        return BL_TYPES[self.data["dataType"]]
 
+    @property
+    def ab_tags(self):
+        return self.data["tags"]
+
+    @memoised_property
+    def ab_categories(self):
+        return [t for t in self.ab_tags if t not in {"hdri", "3d"} and not re.match("\d+", t)]
+
+    @property
+    def quality_data(self):
+        return self.data["quality_levels"]
+
+    @memoised_property
+    def ab_label(self):
         # Modify the label
-        label = name
+        label = self.ab_name
         if label.startswith("3D"):
             label = label[2:]
         label = label.replace("HDRI", "")
         label = re.sub("([A-Z])", " \\1", label)[1:]
         label = re.sub("(\\d\\d\\d)", " \\1 ", label)
-        self.ab_label = label
-
-        # The quality levels to show in the UI, in the format of an EnumProperty items list
-        try:
-            self.quality_data = data["quality_levels"]
-        except KeyError:
-            # If no quality levels, asset is not valid
-            self.ab_is_valid = False
-            return
-
-        self.ab_quality_levels = []
-        for name, quality_data in data["quality_levels"].items():
+        return label
+
+    @memoised_property
+    def ab_quality_levels(self):
+        """The quality levels to show in the UI, in the format of an EnumProperty items list"""
+        quality_levels = []
+        for name, quality_data in self.quality_data.items():
             if "PREVIEW" in name:
                 continue
             label = name.lower().replace("-", " ").replace("lq", "Low").replace("sq", "Medium").replace("hq", "High")
             label = f"{label} ({human_readable_file_size(quality_data['size'])})"
-            self.ab_quality_levels.append((name, label, f"Download this asset at {label} quality"))
-            # self.quality_levels.append((name, name, f"Download this asset at {label} quality"))
+            quality_levels.append((name, label, f"Download this asset at {label} quality"))
 
         model_levels = ["LQ", "SQ", "HQ"]
 
@@ -77,16 +95,20 @@ class ACG_AssetListItem(AssetListItem):
                 qual = parts[0].split("K")[0].split("k")[0]
                 try:
                     value += int(qual)
-                except ValueError as e:
+                except ValueError:
                     print(
                         f"Error sorting quality levels for asset {self.ab_name}, quality_level '{qual}':\n{format_exc()}"
                     )
             return value
 
-        self.ab_quality_levels.sort(key=sort_quality)
+        quality_levels.sort(key=sort_quality)
+        return quality_levels
 
-        # Setup info for the metadata panel
-        self.ab_metadata = [
+    @memoised_property
+    def ab_metadata(self):
+        """Setup info for the metadata panel"""
+        data = self.data
+        metadata = [
             Metadata(
                 "Link",
                 "AmbientCG",
@@ -106,7 +128,7 @@ class ACG_AssetListItem(AssetListItem):
             Metadata("tags", data["tags"]),
         ]
         if data["dimensionX"]:
-            self.ab_metadata.append(
+            metadata.append(
                 Metadata(
                     "Dimensions",
                     [[data["dimensionX"], data["dimensionY"], data["dimensionZ"]]],
@@ -114,7 +136,7 @@ class ACG_AssetListItem(AssetListItem):
                 )
             )
 
-        self.ab_metadata.append(
+        metadata.append(
             Metadata(
                 "Support",
                 ["Patreon", "Ko-Fi"],
@@ -126,6 +148,7 @@ class ACG_AssetListItem(AssetListItem):
                 label_icon="FUND",
             ),
         )  # yapf: disable
+        return metadata
 
     def poll(self):
         # These are models with a weird format.
@@ -153,9 +176,11 @@ class ACG_AssetListItem(AssetListItem):
         return ""
 
     def download_preview(self):
+        download_file(self.get_preview_url(), self.previews_dir, self.preview_name)
+
+    def get_preview_url(self) -> str:
         # url = f"https://cdn3.struffelproductions.com/file/ambientCG/media/sphere/128-PNG/{self.ab_name}_PREVIEW.png"
-        url = f"https://acg-media.struffelproductions.com/file/ambientCG-Web/media/thumbnail/128-JPG-242424/{self.ab_name}.jpg"
-        download_file(url, self.previews_dir, self.preview_name)
+        return f"https://acg-media.struffelproductions.com/file/ambientCG-Web/media/thumbnail/128-JPG-242424/{self.ab_name}.jpg"
 
     def get_high_res_urls(self) -> list[str]:
         # url = f"https://cdn3.struffelproductions.com/file/ambientCG/media/sphere/1024-JPG-242424/{self.ab_name}_PREVIEW.jpg"
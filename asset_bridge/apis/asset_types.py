@@ -11,7 +11,9 @@ from dataclasses import field, dataclass
 from bpy.types import ID, Context, UILayout
 from ..previews import get_icon
 
-from ..constants import DIRS
+from ..constants import DIRS, PART_SUFFIX
+from ..helpers.list_cache import AssetListCache
+from ..helpers.download_state import download_states
 
 
 @dataclass
@@ -76,8 +78,66 @@ class AssetMetadataItem():
                 left.label(text="")
 
 
+@dataclass
+class AssetListChanges():
+    """The idnames of the assets that have been added, removed or changed when an asset list is updated."""
+
+    added: set[str] = field(default_factory=set)
+    removed: set[str] = field(default_factory=set)
+    changed: set[str] = field(default_factory=set)
+    full: bool = False  # The whole list has been replaced, so the individual changes aren't known
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed or self.full)
+
+    def merge(self, newer: AssetListChanges):
+        """Combine these changes with ones that happened after them"""
+        self.full |= newer.full
+        for idname in newer.added:
+            if idname in self.removed:
+                self.removed.remove(idname)
+                self.changed.add(idname)
+            else:
+                self.added.add(idname)
+
+        for idname in newer.removed:
+            if idname in self.added:
+                self.added.remove(idname)
+            else:
+                self.changed.discard(idname)
+                self.removed.add(idname)
+
+        self.changed |= newer.changed - self.added
+        return self
+
+
+class memoised_property:
+    """A property that is only calculated the first time that it is accessed.
+    This is the same as functools.cached_property, except that it works with classes that use __slots__,
+    as long as they define a slot called '_<property name>' to store the value in."""
+
+    def __init__(self, func: Callable):
+        self.func = func
+        self.slot_name = f"_{func.__name__}"
+        self.__doc__ = func.__doc__
+
+    def __get__(self, instance, owner=None):
+        if instance is None:
+            return self
+        try:
+            return getattr(instance, self.slot_name)
+        except AttributeError:
+            value = self.func(instance)
+            setattr(instance, self.slot_name, value)
+            return value
+
+
 class AssetListItem(ABC):
-    """A light representation of an asset, only containing info needed for display before being selected"""
+    """A light representation of an asset, only containing info needed for display before being selected.
+    There are thousands of these, so they only store the raw data from the API, and the info that's only needed
+    once the asset has been selected (label, metadata, quality levels) is created from it when first accessed."""
+
+    __slots__ = ("ab_name", "ab_asset_list", "data")
 
     # Attributes starting with ab_ are reserved and used by the addon
 
@@ -88,6 +148,7 @@ class AssetListItem(ABC):
     ab_prefix: str  # Used as a prefix for the assets idname, to ensure that all asset names are unique
     ab_idname: str  # The unique Asset Bridge identifier of this asset
     ab_name: str  # The api name of the asset
+    data: dict  # The raw data for this asset returned by the API
     ab_label: str  # The name visible in the UI
     ab_type: str  # HDRI/Texture/Model etc.
     ab_bl_type: ID  # The type of asset to import (World, Object, Material etc.)
@@ -129,6 +190,13 @@ class AssetListItem(ABC):
     def progress_file(self):
         return DIRS.dummy_assets / f"{self.ab_name}"
 
+    def invalidate(self):
+        """Clear all of the info that has been calculated from the raw data, so that it is recalculated when needed"""
+        for cls in type(self).__mro__:
+            for slot in getattr(cls, "__slots__", ()):
+                if slot.startswith("_ab_") and hasattr(self, slot):
+                    delattr(self, slot)
+
     def get_quality_dir(self, quality_level: str):
         return self.downloads_dir / quality_level
 
@@ -142,6 +210,10 @@ class AssetListItem(ABC):
         """Download a preview for this asset.
         Returns an empty string if the download was successful or an error message otherwise"""
 
+    @abstractmethod
+    def get_preview_url(self) -> str:
+        """Return the url of the small preview image that is downloaded by download_preview"""
+
     def get_high_res_urls(self) -> list[str]:
         """return a list of high resolution preview image urls for this asset"""
 
@@ -156,14 +228,15 @@ class AssetListItem(ABC):
         # asset.link_method = link_method
         return asset
 
-    def is_downloaded(self, quality_level) -> bool:
-        """Return whether this asset has been downloaded at a certain quality level"""
-        quality_dir = self.downloads_dir / quality_level
-        if not quality_dir.exists():
-            return False
-        if not os.listdir(quality_dir):
-            return False
-        return True
+    def is_downloaded(self, quality_level, cached: bool = True) -> bool:
+        """Return whether this asset has been downloaded at a certain quality level.
+        This is cached so that it can be called when drawing, use cached=False to check the disk directly."""
+        return download_states.is_downloaded(
+            self.ab_idname,
+            quality_level,
+            self.downloads_dir / quality_level,
+            cached=cached,
+        )
 
     def __str__(self):
         return f"<{self.ab_asset_list.name}_list_item: {self.ab_idname}>"
@@ -174,12 +247,21 @@ class AssetList(ABC):
 
     name: str
     label: str
+    item_type: Type[AssetListItem]
     assets: OrderedDict[str, AssetListItem]
     url: str
     support_url: str
     description: str
     categories: list[str]
 
+    # The HTTP validators (ETag, Last-Modified) of the get_data response that this list was created from.
+    # These are stored alongside the cached data, so that it can be checked for changes later.
+    validators: dict[str, str] = {}
+
+    # Keys of the raw asset data that change all the time (download counts etc.).
+    # Differences in these are applied to existing items, but the asset isn't counted as having changed.
+    volatile_keys: set[str] = set()
+
     @property
     def icon_path(self) -> Path:
         """The path to the icon for this asset list.
@@ -193,10 +275,15 @@ class AssetList(ABC):
         Requires the icon_path to be set."""
         return get_icon(self.icon_path.stem)
 
+    @classmethod
+    @property
+    def data_cache(self) -> AssetListCache:
+        return AssetListCache(DIRS.cache, self.name)
+
     @classmethod
     @property
     def data_cache_file(self) -> Path:
-        return DIRS.cache / (self.name + ".json")
+        return self.data_cache.file
 
     def __getitem__(self, key) -> AssetListItem:
         return self.assets[key]
@@ -218,14 +305,55 @@ class AssetList(ABC):
 
     @staticmethod
     @abstractmethod
-    def get_data() -> dict:
-        """Return the raw asset list data from the website API as a dict.
-        This is then used to initialize the asset list"""
+    def get_data(validators: dict[str, str] = None) -> tuple[dict | None, dict[str, str]]:
+        """Return the raw asset list data from the website API as a dict, along with the HTTP validators of the
+        response. The data is then used to initialize the asset list.
+        If validators are given, the request should be conditional, and None returned if the data hasn't changed."""
 
     @abstractmethod
     def __init__(self, data) -> None:
         """Initialize a new asset list from the raw data returned by the website API."""
 
+    def create_item(self, name: str, data: dict) -> AssetListItem | None:
+        """Create a list item from the raw data of a single asset, or return None if the asset isn't supported."""
+        return self.item_type(name, data)
+
+    def update(self, data: dict) -> AssetListChanges:
+        """Update this list in place with new raw data from the website API.
+        Only the assets that have been added or have changed are created again, the rest are reused."""
+        changes = AssetListChanges()
+        new_assets = OrderedDict()
+        prefix = self.item_type.ab_prefix
+        for name, asset_data in data.items():
+            idname = f"{prefix}_{name}"
+            old_item = self.assets.get(idname)
+            if old_item and old_item.data == asset_data:
+                new_assets[idname] = old_item
+                continue
+
+            if old_item and self.strip_volatile(old_item.data) == self.strip_volatile(asset_data):
+                old_item.data = asset_data
+                old_item.invalidate()
+                new_assets[idname] = old_item
+                continue
+
+            item = self.create_item(name, asset_data)
+            if not item or not item.ab_is_valid:
+                continue
+            item.ab_asset_list = self
+            new_assets[idname] = item
+            if old_item:
+                changes.changed.add(idname)
+            else:
+                changes.added.add(idname)
+
+        changes.removed = set(self.assets.keys()) - set(new_assets.keys())
+        self.assets = new_assets
+        return changes
+
+    def strip_volatile(self, asset_data: dict) -> dict:
+        return {k: v for k, v in asset_data.items() if k not in self.volatile_keys}
+
     def __str__(self) -> str:
         return f"<asset_list: {self.name}>"
 
@@ -249,8 +377,8 @@ class Asset(ABC):
 
     @property
     def is_downloaded(self) -> bool:
-        """Whether this asset has been downloaded"""
-        return self.list_item.is_downloaded(self.quality_level)
+        """Whether this asset has been downloaded, checked on the disk rather than from the cache"""
+        return self.list_item.is_downloaded(self.quality_level, cached=False)
 
     @abstractmethod
     def __init__(
@@ -266,8 +394,10 @@ class Asset(ABC):
         """Return the number of bytes that need to be downloaded"""
 
     @abstractmethod
-    def download_asset(self):
-        pass
+    def download_asset(self, on_progress: Callable[[int], None] = None):
+        """Download the files for this asset.
+        on_progress is called with the number of bytes received each time a chunk of data is downloaded,
+        and can be called from multiple threads at once."""
 
     @abstractmethod
     def import_asset(self, context: Context):
@@ -277,7 +407,7 @@ class Asset(ABC):
         "Get a list of downloaded files"
         files = []
         for (dirpath, dirnames, filenames) in os.walk(self.download_dir):
-            files += [Path(dirpath) / file for file in filenames]
+            files += [Path(dirpath) / file for file in filenames if not file.endswith(PART_SUFFIX)]
         return files
 
     def __str__(self):
@@ -1,17 +1,22 @@
+import os
 import json
 import math
+import hashlib
 from pathlib import Path
-from shutil import copyfileobj
 from time import perf_counter
-from typing import Dict, Literal, Type
+from threading import Thread, current_thread, main_thread
+from typing import Callable, Dict, Literal, Type
 
 import bpy
 from bpy.types import Material, Node, NodeGroup, Object
 from mathutils import Vector as V
 
 from ..api import asset_lists
-from ..constants import __IS_DEV__, FILES, NODE_GROUPS, NODES, ServerError503
+from ..constants import __IS_DEV__, FILES, NODE_GROUPS, NODES, PART_SUFFIX, ServerError503
+from ..helpers.connectivity import connectivity
+from ..helpers.main_thread import run_in_main_thread
 from ..helpers.prefs import get_prefs
+from ..helpers.session import get_session
 from ..previews import load_icon
 from ..settings import get_ab_scene_settings
 from ..ui.ui_helpers import dpifac
@@ -26,41 +31,74 @@ MODEL = "model"
 
 def register_asset_list(new_list: Type[AssetList]):
     """Register an asset list to be used by the addon"""
-
-    def reg_in_thread():
+    asset_lists[new_list.name] = new_list
+    connectivity.add_url(new_list.url)
+    cache = new_list.data_cache
+    if not cache.exists():
+        # no cached data found, wait for user to initialize the asset list.
+        return
+
+    def load_from_cache():
+        """Read the cached data and create the asset list from it.
+        This doesn't touch any blender data, so it's safe to run outside of the main thread."""
         start = perf_counter()
-        asset_lists[new_list.name] = new_list
-        # Get the cached asset list data if it exists
-        list_file = new_list.data_cache_file
-        asset_list_data = {}
-        if list_file.exists():
-            with open(list_file, "r") as f:
-                try:
-                    asset_list_data = json.load(f)
-                except json.JSONDecodeError:
-                    pass
-
+        asset_list_data = cache.read()
+        read_time = perf_counter() - start
         if not asset_list_data:
-            # no cached data found, wait for user to initialize the asset list.
-            return
+            return None
 
-        asset_list = asset_lists.initialize_asset_list(new_list.name, data=asset_list_data)
+        asset_list = asset_lists.initialize_asset_list(new_list.name, data=asset_list_data, validators=cache.validators)
         if asset_list is None:
-            return {"CANCELLED"}
-
-        # Load the list icon if it exists
-        load_icon(asset_list.icon_path)
+            return None
+        create_time = perf_counter() - start - read_time
+
+        def load_list_icon():
+            icon_start = perf_counter()
+            load_icon(asset_list.icon_path)
+            if __IS_DEV__:
+                print(f"Loading the icon for {new_list.name} took {perf_counter() - icon_start:.3f}s")
+
+        # Loading the icon uses the bpy api, which is what caused crashes when this was all run in a thread.
+        if current_thread() is main_thread():
+            load_list_icon()
+        else:
+            run_in_main_thread(load_list_icon)
 
         if __IS_DEV__:
-            print(f"Initialization for {new_list.name} took {perf_counter() - start:.2f}s")
+            print(
+                f"Initialization for {new_list.name} took {perf_counter() - start:.2f}s",
+                f"(reading cache: {read_time:.2f}s, creating list: {create_time:.2f}s)",
+            )
+        return asset_list
 
     # Load the asset list in another thread to prevent locking the UI and slowing down blender loading.
-    # Turns out this can cause crashes. Would be good to fix in the future.
-    # thread = Thread(target=reg_in_thread)
-    # thread.start()
-
-    reg_in_thread()
-    return
+    # If the list is needed before the thread has finished, accessing it will wait for the thread to finish,
+    # or load it directly if the thread hasn't got to it yet.
+    asset_lists.defer_initialization(new_list.name, load_from_cache)
+    thread = Thread(target=asset_lists.load_pending, args=[new_list.name], name=f"load_{new_list.name}")
+    thread.start()
+
+
+def conditional_headers(validators: dict[str, str] = None) -> dict[str, str]:
+    """Get the headers needed to make a request conditional on the resource having changed since it was last fetched"""
+    headers = {}
+    if not validators:
+        return headers
+    if etag := validators.get("etag"):
+        headers["If-None-Match"] = etag
+    if last_modified := validators.get("last_modified"):
+        headers["If-Modified-Since"] = last_modified
+    return headers
+
+
+def response_validators(response: requests.Response) -> dict[str, str]:
+    """Get the HTTP validators from a response, that can be used to check if the resource has changed later on."""
+    validators = {}
+    if etag := response.headers.get("ETag"):
+        validators["etag"] = etag
+    if last_modified := response.headers.get("Last-Modified"):
+        validators["last_modified"] = last_modified
+    return validators
 
 
 def file_name_from_url(url: str) -> str:
@@ -68,43 +106,115 @@ def file_name_from_url(url: str) -> str:
     return url.split("/")[-1].split("?")[0]
 
 
-def download_file(url: str, download_dir: Path, file_name: str = "", use_progress_file=True):
-    """Download a file from the provided url to the given file path"""
+# The number of times a download will be resumed after the connection is dropped before giving up
+DOWNLOAD_ATTEMPTS = 5
+CHUNK_SIZE = 1024 * 64
+
+
+def file_md5(file: Path) -> str:
+    """Get the md5 hash of a file, without loading it into memory all at once"""
+    md5 = hashlib.md5()
+    with open(file, "rb") as f:
+        while chunk := f.read(CHUNK_SIZE * 16):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+
+def download_file(
+    url: str,
+    download_dir: Path,
+    file_name: str = "",
+    use_progress_file=True,
+    size: int = 0,
+    md5: str = "",
+    on_progress: Callable[[int], None] = None,
+):
+    """Download a file from the provided url to the given file path.
+    The file is first written to a .part file, which means that if the connection is dropped the download can be
+    resumed from where it left off. Once complete, it is checked against the expected size and md5 hash if they are
+    given, and is then moved to its final location, so a file with the final name is always a complete one.
+    If on_progress is given, it is called with the number of bytes received each time a chunk is written."""
     if not isinstance(download_dir, Path):
         download_dir = Path(download_dir)
 
     download_dir.mkdir(exist_ok=True, parents=True)
     file_name = file_name or file_name_from_url(url)
     download_file = download_dir / file_name
-    # progress_file = download_dir / f"{file_name}.progress.txt"
-
-    with requests.get(url, stream=True) as result:
-        if result.status_code != 200:
-            with open(FILES.download_log, "w") as f:
-                f.write(url)
-                f.write("\n")
-                f.write(str(result.status_code))
-
-            # This can be handled specially to provide better information to the user.
-            if result.status_code == 503:
-                raise ServerError503(url)
-
-            raise requests.ConnectionError(
-                f"Could not download file at url:\n{url}\nbecause of a connection error (code {result.status_code})"
-            )
-        with open(download_file, "wb") as f:
-            copyfileobj(result.raw, f)
-            # for chunk in result.iter_content(chunk_size=8192):
-            #     size = f.write(chunk)
-            #     total += size
-            #     if progress_file and time() - last_write > .05:
-            #         with open(progress_file, "w") as pf:
-            #             pf.write(str(total))
-            #         last_write = time()
-
-    # if progress_file.exists():
-    #     os.remove(progress_file)
+    part_file = download_dir / (file_name + PART_SUFFIX)
+    # The number of bytes that have been reported through on_progress
+    reported = 0
+
+    def report(value: int):
+        nonlocal reported
+        if on_progress and value:
+            reported += value
+            on_progress(value)
+
+    for attempt in range(DOWNLOAD_ATTEMPTS):
+        # Resume from the end of any previous partial download
+        start = part_file.stat().st_size if part_file.exists() else 0
+        # Include the data from previous partial downloads in the progress
+        report(start - reported)
+        if size and start >= size:
+            break
+        headers = {"Range": f"bytes={start}-"} if start else {}
+
+        with get_session().get(url, stream=True, headers=headers) as result:
+            if result.status_code == 416:
+                # The range isn't satisfiable, so the part file is either already complete or invalid.
+                # Either way, it will be checked and restarted if needed below.
+                break
+
+            if result.status_code not in {200, 206}:
+                with open(FILES.download_log, "w") as f:
+                    f.write(url)
+                    f.write("\n")
+                    f.write(str(result.status_code))
+
+                # This can be handled specially to provide better information to the user.
+                if result.status_code == 503:
+                    raise ServerError503(url)
+
+                raise requests.ConnectionError(
+                    f"Could not download file at url:\n{url}\nbecause of a connection error (code {result.status_code})"
+                )
 
+            # The server doesn't support ranges, so the whole file is being sent again.
+            mode = "ab" if result.status_code == 206 else "wb"
+            if mode == "wb":
+                report(-reported)
+            if not size and (length := result.headers.get("Content-Length")):
+                size = int(length) + (start if mode == "ab" else 0)
+
+            try:
+                with open(part_file, mode) as f:
+                    for chunk in result.iter_content(chunk_size=CHUNK_SIZE):
+                        f.write(chunk)
+                        report(len(chunk))
+            except (requests.ConnectionError, requests.exceptions.ChunkedEncodingError) as e:
+                if attempt == DOWNLOAD_ATTEMPTS - 1:
+                    raise e
+                print(f"Asset Bridge: Connection dropped while downloading '{file_name}', resuming ({e})")
+                continue
+
+        if not size or part_file.stat().st_size >= size:
+            break
+
+    # Verify the downloaded file
+    error = ""
+    downloaded_size = part_file.stat().st_size if part_file.exists() else 0
+    if size and downloaded_size != size:
+        error = f"expected a size of {size} bytes, but got {downloaded_size} bytes"
+    elif md5 and file_md5(part_file) != md5.lower():
+        error = "the file is corrupted (md5 hash mismatch)"
+
+    if error:
+        # Remove the invalid file so that the next attempt starts from scratch
+        part_file.unlink(missing_ok=True)
+        report(-reported)
+        raise requests.ConnectionError(f"Could not download file at url:\n{url}\nbecause {error}")
+
+    os.replace(part_file, download_file)
     return download_file
 
 
@@ -1,15 +1,15 @@
-from typing import TYPE_CHECKING
+from typing import TYPE_CHECKING, Callable
 from pathlib import Path
-from threading import Thread
 
 from bpy.types import Context
 
-from ...vendor import requests
+from ...helpers.session import get_session
+from ...helpers.scheduler import scheduler
 from ..asset_types import Asset
 from ..asset_types import AssetListItem as PH_AssetListItem
 from ..asset_utils import (HDRI, MODEL, MATERIAL, import_hdri, import_model, download_file, import_material,
                            file_name_from_url)
-from ...helpers.process import new_blender_process
+from ...helpers.worker_pool import worker_pool
 from ...operators.op_report_message import report_message
 
 if TYPE_CHECKING:
@@ -33,7 +33,7 @@ class PH_Asset(Asset):
             self.link_method = link_method
 
         # example: https://api.polyhaven.com/files/carrot_cake
-        self.raw_data = requests.get(f"https://api.polyhaven.com/files/{self.name}").json()
+        self.raw_data = get_session().get(f"https://api.polyhaven.com/files/{self.name}").json()
 
     @property
     def downloads_path(self):
@@ -62,12 +62,12 @@ class PH_Asset(Asset):
         # TODO: deal with this
         return sum([f["size"] for f in self.get_files_to_download(self.quality_level)])
 
-    def download_asset(self):
+    def download_asset(self, on_progress: Callable[[int], None] = None):
         if not self.quality_level:
             raise ValueError(f"Cannot download {self.name} without providing a quality level")
 
-        urls = self.get_files_to_download(self.quality_level)
-        urls = [f["url"] for f in urls]
+        files = self.get_files_to_download(self.quality_level)
+        urls = [f["url"] for f in files]
         paths: list[Path] = []
         for url in urls:
             if self.type == MODEL and not url.endswith(".blend"):
@@ -75,37 +75,34 @@ class PH_Asset(Asset):
             else:
                 paths.append(self.download_dir)
 
-        threads = []
+        jobs = []
 
-        # Download all of the files in separate threads
-        for path, url in zip(paths, urls):
+        # Download all of the files in parallel
+        for path, url, file in zip(paths, urls, files):
             path.mkdir(parents=True, exist_ok=True)
             name = file_name_from_url(url) if not url.endswith(".blend") else self.name + ".blend"
-            thread = Thread(target=download_file, args=(url, path, name))
-            thread.start()
-            threads.append(thread)
+            kwargs = {"size": file.get("size", 0), "md5": file.get("md5", ""), "on_progress": on_progress}
+            jobs.append(scheduler.submit(download_file, args=(url, path, name), kwargs=kwargs, url=url))
 
-        for thread in threads:
-            thread.join()
+        # Wait for the files, and raise any errors
+        for job in jobs:
+            job.result()
 
         # Process the downloaded blend file if needed
         if self.type == MODEL:
 
             blend_file = [f for f in self.get_files() if f.suffix == ".blend"][0]
             print(self.idname)
-            process = new_blender_process(
+            job = worker_pool.submit(
                 script=Path(__file__).parent / "scripts" / "ph_sc_setup_asset.py",
-                script_args=("--name", self.name, "--import_name", self.import_name),
+                args=("--name", self.name, "--import_name", self.import_name),
                 file=blend_file,
-                use_stdout=True,
             )
-
-            process.wait()
+            job.wait()
 
             # Handle errors
-            out = process.stdout.read().decode()
-            if "Error" in out:
-                report_message("ERROR", f"Error setting up Poly Haven asset blend file:\n{out}")
+            if job.failed:
+                report_message("ERROR", f"Error setting up Poly Haven asset blend file:\n{job.error_message}")
 
     def import_asset(self, context: Context):
         files = self.get_files()
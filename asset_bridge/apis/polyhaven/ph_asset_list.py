@@ -1,8 +1,8 @@
 from collections import OrderedDict
 
-from ...vendor import requests
+from ...helpers.session import get_session
 from ..asset_types import AssetList
-from ..asset_utils import register_asset_list
+from ..asset_utils import conditional_headers, register_asset_list, response_validators
 from .ph_asset_list_item import PH_AssetListItem
 
 
@@ -10,7 +10,9 @@ class PH_AssetList(AssetList):
 
     name = "poly_haven"
     label = "Poly Haven"
+    item_type = PH_AssetListItem
     assets: OrderedDict[str, PH_AssetListItem] = OrderedDict()
+    volatile_keys = {"download_count"}
 
     url = "http://polyhaven.com"
     support_url = "https://www.patreon.com/polyhaven/overview"
@@ -18,14 +20,17 @@ class PH_AssetList(AssetList):
     providing useful high quality 3D assets in an easily obtainable manner.""".replace("\n    ", "")
 
     @staticmethod
-    def get_data() -> dict:
+    def get_data(validators: dict[str, str] = None) -> tuple[dict | None, dict[str, str]]:
         url = "https://api.polyhaven.com/assets"
-        return requests.get(url).json()
+        result = get_session().get(url, headers=conditional_headers(validators))
+        if result.status_code == 304:
+            return None, validators
+        return result.json(), response_validators(result)
 
     def __init__(self, data: dict):
         self.assets = OrderedDict()
         for name, asset_info in data.items():
-            item = PH_AssetListItem(name, asset_info)
+            item = self.create_item(name, asset_info)
             self.assets[item.ab_idname] = item
 
 
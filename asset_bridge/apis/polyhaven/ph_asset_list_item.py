@@ -3,42 +3,68 @@ from threading import Thread
 
 from bpy.types import Material, Object, World
 
-from ...constants import DIRS
 from ...helpers.library import human_readable_file_size
 from ...helpers.main_thread import force_ui_update
-from ..asset_types import AssetListItem, AssetMetadataItem
+from ..asset_types import AssetListItem, AssetMetadataItem, memoised_property
 from ..asset_utils import HDRI, MATERIAL, MODEL, dimensions_to_string, download_file
 from .ph_asset import PH_Asset
 from .ph_op_open_author_website import AB_OT_open_ph_author_website
 
+ASSET_TYPES = [HDRI, MATERIAL, MODEL]
+BL_TYPES = [World, Material, Object]
+
 
 class PH_AssetListItem(AssetListItem):
 
+    __slots__ = ("asset", "loading_asset", "_ab_categories", "_ab_metadata", "_ab_quality_levels")
+
     ab_prefix = "ph"
     ab_asset_type = PH_Asset
 
     def __init__(self, name: str, data: dict):
+        self.ab_name = name
+        self.data = data
         self.asset: PH_Asset = None
+        self.loading_asset = False
 
-        asset_types = [HDRI, MATERIAL, MODEL]
-        bl_types = [World, Material, Object]
-        self.ab_name = name
-        self.ab_label = data["name"]
-        self.ab_type = asset_types[data["type"]]
-        self.ab_bl_type = bl_types[data["type"]]
-        self.ab_authors = list(data["authors"].keys()) or [""]
-        self.ab_categories = [c for c in data["categories"] if ":" not in c]
-        # self.ab_categories = data["categories"]
-        for cat in self.ab_categories:
-            if ":" in cat:
-                print(cat)
-        self.ab_tags = data["tags"] + data["categories"]
-        self.page_url = f"https://polyhaven.com/a/{name}"
+    @property
+    def ab_label(self):
+        return self.data["name"]
 
-        self.loading_asset = False
+    @property
+    def ab_type(self):
+        return ASSET_TYPES[self.data["type"]]
 
-        # Add metadata items
-        self.ab_metadata = [
+    @property
+    def ab_bl_type(self):
+        return BL_TYPES[self.data["type"]]
+
+    @property
+    def ab_authors(self):
+        return list(self.data["authors"].keys()) or [""]
+
+    @memoised_property
+    def ab_categories(self):
+        return [c for c in self.data["categories"] if ":" not in c]
+
+    @property
+    def ab_tags(self):
+        return self.data["tags"] + self.data["categories"]
+
+    @property
+    def ab_material_size(self):
+        if "dimensions" in self.data:
+            return self.data["dimensions"][0] / 1000
+        return 1.0
+
+    @property
+    def page_url(self):
+        return f"https://polyhaven.com/a/{self.ab_name}"
+
+    @memoised_property
+    def ab_metadata(self):
+        data = self.data
+        metadata = [
             AssetMetadataItem(
                 "Link",
                 "Poly Haven",
@@ -59,22 +85,21 @@ class PH_AssetListItem(AssetListItem):
 
         if "dimensions" in data:
             # This needs the context to work so pass it as an argument
-            self.ab_metadata.append(
+            metadata.append(
                 AssetMetadataItem(
                     "Dimensions",
                     [data["dimensions"]],
                     to_string=dimensions_to_string,
                 )
             )
-            self.ab_material_size = data["dimensions"][0] / 1000
 
         if "evs" in data:
-            self.ab_metadata.append(AssetMetadataItem("EVs", str(data["evs"])))
+            metadata.append(AssetMetadataItem("EVs", str(data["evs"])))
 
         if "whitebalance" in data:
-            self.ab_metadata.append(AssetMetadataItem("Whitebalance", f"{str(data['whitebalance'])}K"))
+            metadata.append(AssetMetadataItem("Whitebalance", f"{str(data['whitebalance'])}K"))
 
-        self.ab_metadata.append(
+        metadata.append(
             AssetMetadataItem(
                 "Date published",
                 datetime.fromtimestamp(data["date_published"]).strftime(format="%d/%m/%Y"),
@@ -82,20 +107,20 @@ class PH_AssetListItem(AssetListItem):
         )
 
         if "date_taken" in data:
-            self.ab_metadata.append(
+            metadata.append(
                 AssetMetadataItem(
                     "Date taken",
                     datetime.fromtimestamp(data["date_taken"]).strftime(format="%d/%m/%Y"),
                 )
             )
 
-        self.ab_metadata.append(
+        metadata.append(
             AssetMetadataItem(
                 "Tags",
                 data["tags"],
             )
         )
-        self.ab_metadata.append(
+        metadata.append(
             AssetMetadataItem(
                 "Support",
                 "Patreon",
@@ -104,11 +129,17 @@ class PH_AssetListItem(AssetListItem):
                 label_icon="FUND",
             )
         )
+        return metadata
 
     @property
     def ab_quality_levels(self):
         """The quality levels of Poly haven assets aren't accessible from the normal asset list,
         So here we load the full asset and cache it, use its data to get the quality levels."""
+        try:
+            return self._ab_quality_levels
+        except AttributeError:
+            pass
+
         if not self.asset:
 
             def load_asset():
@@ -131,11 +162,14 @@ class PH_AssetListItem(AssetListItem):
             size = human_readable_file_size(self.asset.get_download_size()).replace(" ", "")
             label = f"{name} ({size})"
             items.append((name, label, f"Load asset at {name} resolution"))
+        self._ab_quality_levels = items
         return items
 
     def download_preview(self, size=128):
-        url = f"https://cdn.polyhaven.com/asset_img/thumbs/{self.ab_name}.png?width={size}&height={size}"
-        download_file(url, DIRS.previews, f"{self.ab_idname}.png")
+        download_file(self.get_preview_url(size), self.previews_dir, self.preview_name)
+
+    def get_preview_url(self, size=128) -> str:
+        return f"https://cdn.polyhaven.com/asset_img/thumbs/{self.ab_name}.png?width={size}&height={size}"
 
     def get_high_res_urls(self) -> list[str]:
         urls = [
@@ -1,7 +1,7 @@
 import bpy
 from bpy.props import StringProperty
 
-from ...vendor import requests
+from ...helpers.session import get_session
 from ...helpers.btypes import BOperator
 
 
@@ -12,7 +12,7 @@ class AB_OT_open_ph_author_website(BOperator.type):
     author_name: StringProperty()
 
     def execute(self, context):
-        data = requests.get(f"https://api.polyhaven.com/author/{self.author_name}").json()
+        data = get_session().get(f"https://api.polyhaven.com/author/{self.author_name}").json()
         if "link" in data:
             link = data["link"]
         elif "email" in data:
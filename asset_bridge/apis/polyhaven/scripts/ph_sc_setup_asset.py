@@ -26,4 +26,6 @@ blend1_file = Path(bpy.data.filepath + "1")
 if blend1_file.exists():
     os.remove(blend1_file)
 
-bpy.ops.wm.quit_blender()
\ No newline at end of file
+# Don't quit when run by a worker process (sc_worker.py)
+if __name__ == "__main__":
+    bpy.ops.wm.quit_blender()
\ No newline at end of file
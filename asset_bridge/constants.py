@@ -12,6 +12,8 @@ ASSET_LIB_NAME = "Asset Bridge"
 PREVIEW_DOWNLOAD_TASK_NAME = "preview_download"
 CHECK_NEW_ASSETS_TASK_NAME = "check_new_assets"
 AB_COLLECTION_NAME = "Asset Bridge assets"
+# Partially downloaded files are given this suffix until they have been completed and verified
+PART_SUFFIX = ".part"
 
 
 # Custom web response errors
@@ -95,10 +97,12 @@ class Dirs:
 
 class Files:
     script_create_dummy_assets = Dirs.scripts / "sc_create_dummy_assets.py"
+    script_worker = Dirs.scripts / "sc_worker.py"
     resources_blend = Dirs.resources / "resources.blend"
     prefs = Dirs.cache / "prefs.json"
     log = Dirs.cache / "log.txt"
     download_log = Dirs.cache / "download_log.txt"
+    preview_manifest = Dirs.cache / "preview_manifest.json"
 
     def update(self, lib_path: Path = ""):
         lib = lib_path or DIRS.library
@@ -107,6 +111,7 @@ class Files:
         if hasattr(DIRS, "dummy_assets"):
             self.lib_progress = DIRS.dummy_assets / "progress.json"
             self.asset_catalog = DIRS.dummy_assets / "blender_assets.cats.txt"
+            self.shard_counts = DIRS.dummy_assets / "shard_counts.json"
         return self
 
 
@@ -1,7 +1,9 @@
 # from asset_bridge.operators import AB_OT_import_asset
+from array import array
+
 import bpy
 from bpy.app import handlers
-from bpy.types import Scene
+from bpy.types import Depsgraph, Material, Object, Scene
 
 from .constants import ASSET_LIB_NAME
 from .helpers.btypes import ExecContext
@@ -42,8 +44,98 @@ def link_method(area):
     return import_method
 
 
-prev_materials = {}
+class MaterialSlotSnapshot:
+    """The materials in the slots of every object that has any, so that they can be restored if a dummy material is
+    dropped onto one. The materials are stored by session_uid in one flat array, with the position and number of slots
+    of each object kept in an index keyed by the object's session_uid. That way no references to the data are kept,
+    and renaming an object or material doesn't break anything."""
+
+    def __init__(self):
+        self.materials = array("q")
+        # object session_uid -> (start, number of slots)
+        self.index: dict[int, tuple[int, int]] = {}
+        # The number of items in the array that are no longer used by any object
+        self.unused = 0
+
+    def __len__(self):
+        return len(self.index)
+
+    def update(self, obj: Object):
+        """Store the current materials of the object. Empty slots keep the material that was in them before."""
+        slots = obj.material_slots
+        count = len(slots)
+        entry = self.index.get(obj.session_uid)
+        if entry and entry[1] == count:
+            start = entry[0]
+            for i, slot in enumerate(slots):
+                if mat := slot.material:
+                    self.materials[start + i] = mat.session_uid
+            return
+
+        if entry:
+            self.unused += entry[1]
+        if not count:
+            self.index.pop(obj.session_uid, None)
+            return
+        self.index[obj.session_uid] = (len(self.materials), count)
+        self.materials.extend(mat.session_uid if (mat := slot.material) else 0 for slot in slots)
+        if self.unused > len(self.materials) // 2:
+            self.compact()
+
+    def get(self, obj: Object, slot_index: int) -> Material | None:
+        if not (entry := self.index.get(obj.session_uid)) or slot_index >= entry[1]:
+            return None
+        if not (uid := self.materials[entry[0] + slot_index]):
+            return None
+        # This is only needed when an asset is dropped, so searching the materials is fine
+        return next((mat for mat in bpy.data.materials if mat.session_uid == uid), None)
+
+    def prune(self, object_uids: set[int]):
+        """Remove the objects that no longer exist"""
+        for uid in list(self.index):
+            if uid not in object_uids:
+                self.unused += self.index.pop(uid)[1]
+        if self.unused > len(self.materials) // 2:
+            self.compact()
+
+    def compact(self):
+        materials = array("q")
+        for uid, (start, count) in self.index.items():
+            self.index[uid] = (len(materials), count)
+            materials.extend(self.materials[start:start + count])
+        self.materials = materials
+        self.unused = 0
+
+    def clear(self):
+        self.materials = array("q")
+        self.index.clear()
+        self.unused = 0
+
+
+prev_materials = MaterialSlotSnapshot()
 prev_world = None
+# The number of each type of data block that can be a dummy asset, as of the last update.
+# Dragging an asset in from the asset browser always adds a new data block, so if none of these have changed,
+# there can't be any new dummy assets, and the scene doesn't need to be searched for them.
+id_counts: dict[str, int] = {}
+DUMMY_ID_COLLECTIONS = ("worlds", "materials", "objects")
+
+
+def get_changed_id_collections() -> set[str]:
+    """Return the names of the bpy.data collections that have had data blocks added or removed since the last call"""
+    changed = set()
+    for name in DUMMY_ID_COLLECTIONS:
+        count = len(getattr(bpy.data, name))
+        if id_counts.get(name) != count:
+            id_counts[name] = count
+            changed.add(name)
+    return changed
+
+
+def rebuild_material_snapshot():
+    prev_materials.clear()
+    for obj in bpy.data.objects:
+        prev_materials.update(obj)
 
 
 @handlers.persistent
@@ -53,11 +145,16 @@ def depsgraph_update_pre_handler(scene: Scene, _):
     if bpy.app.background:
         return
 
+    global prev_world
+    changed = get_changed_id_collections()
+    if not changed:
+        prev_world = scene.world or prev_world
+        return
+
     quality = get_asset_quality(bpy.context)
     reload = bpy.context.window_manager.asset_bridge.reload_asset
 
     # Hdris
-    global prev_world
     if (world := scene.world) and world.asset_bridge.is_dummy:
         name = world.asset_bridge.idname
         bpy.data.worlds.remove(world)
@@ -75,63 +172,70 @@ def depsgraph_update_pre_handler(scene: Scene, _):
     prev_world = scene.world or prev_world
 
     # Materials
-    global prev_materials
-    for obj in scene.objects:
-        for i, slot in enumerate(obj.material_slots):
-            if (mat := slot.material) and mat.asset_bridge.is_dummy:
-                name = mat.asset_bridge.idname
-                bpy.data.materials.remove(mat)
-                # print("Material!", name)
-                # We can't pass a material slot directly, so set it as a class attribute.
-                # This is very hacky, and there's almost certainly a good reason not to do it,
-                # But I haven't found it yet ¯\_(ツ)_/¯
-                AB_OT_import_asset.run(
-                    ExecContext.INVOKE,
-                    asset_name=name,
-                    at_mouse=True,
-                    # location=bpy.context.object.location,
-                    asset_quality=quality,
-                    link_method=link_method(get_browser_area(name)),
-                    reload=reload,
-                    material_slot=slot,
-                )
-                try:
-                    slot.material = prev_materials[obj.name][i]
-                except (IndexError, KeyError) as e:
-                    print(e)
-                    continue
-                except ReferenceError:
-                    continue
+    if "materials" in changed and any(mat.asset_bridge.is_dummy for mat in bpy.data.materials):
+        for obj in scene.objects:
+            for i, slot in enumerate(obj.material_slots):
+                if (mat := slot.material) and mat.asset_bridge.is_dummy:
+                    name = mat.asset_bridge.idname
+                    bpy.data.materials.remove(mat)
+                    # print("Material!", name)
+                    # We can't pass a material slot directly, so set it as a class attribute.
+                    # This is very hacky, and there's almost certainly a good reason not to do it,
+                    # But I haven't found it yet ¯\_(ツ)_/¯
+                    AB_OT_import_asset.run(
+                        ExecContext.INVOKE,
+                        asset_name=name,
+                        at_mouse=True,
+                        # location=bpy.context.object.location,
+                        asset_quality=quality,
+                        link_method=link_method(get_browser_area(name)),
+                        reload=reload,
+                        material_slot=slot,
+                    )
+                    if prev_material := prev_materials.get(obj, i):
+                        slot.material = prev_material
 
-    for obj in bpy.data.objects:
-        mats = [slot.material for slot in obj.material_slots]
-        for i, mat in enumerate(mats):
-            prev_mats = prev_materials.get(obj.name)
-            if not prev_mats or len(prev_mats) != len(mats):
-                continue
+    # Models
+    if "objects" in changed:
+        # Forget about any objects that have been deleted. This can't be skipped based on the number of objects,
+        # as one could have been deleted and another added in the same update.
+        prev_materials.prune({obj.session_uid for obj in bpy.data.objects})
 
-            if not mat:
-                mats[i] = prev_mats[i]
+        objs = [o for o in scene.objects if o.asset_bridge.is_dummy]
+        for obj in objs:
+            name = obj.asset_bridge.idname
+            obj.asset_bridge.is_dummy = False
 
-        prev_materials[obj.name] = mats
+            # For some reason in 4.1 this creates a popup for the user saying "Object not found",
+            # Unless it is run in the next cycle with a timer.
+            run_in_main_thread(bpy.data.objects.remove, [obj])
+            AB_OT_import_asset.run(
+                ExecContext.INVOKE,
+                asset_name=name,
+                link_method=link_method(get_browser_area(name)),
+                at_mouse=True,
+                asset_quality=quality,
+                reload=reload,
+            )
 
-    # Models
-    objs = [o for o in scene.objects if o.asset_bridge.is_dummy]
-    for obj in objs:
-        name = obj.asset_bridge.idname
-        obj.asset_bridge.is_dummy = False
-
-        # For some reason in 4.1 this creates a popup for the user saying "Object not found",
-        # Unless it is run in the next cycle with a timer.
-        run_in_main_thread(bpy.data.objects.remove, [obj])
-        AB_OT_import_asset.run(
-            ExecContext.INVOKE,
-            asset_name=name,
-            link_method=link_method(get_browser_area(name)),
-            at_mouse=True,
-            asset_quality=quality,
-            reload=reload,
-        )
+    # The dummies have been removed, so don't count them as changes next time
+    get_changed_id_collections()
+
+
+@handlers.persistent
+def depsgraph_update_post_handler(scene: Scene, depsgraph: Depsgraph):
+    """Keep the snapshot of the materials in each object's slots up to date, only for the objects that changed"""
+    if bpy.app.background or not depsgraph.id_type_updated("OBJECT"):
+        return
+    for update in depsgraph.updates:
+        if isinstance(obj := update.id.original, Object):
+            prev_materials.update(obj)
+
+
+@handlers.persistent
+def load_post(*_):
+    rebuild_material_snapshot()
+    id_counts.clear()
 
 
 @handlers.persistent
@@ -160,21 +264,31 @@ def undo_post(scene, _):
     for obj in obj_remove:
         bpy.data.objects.remove(obj)
 
+    # Undo replaces all of the data, so the snapshot can't be updated incrementally
+    rebuild_material_snapshot()
+
 
 def register():
     handlers.depsgraph_update_pre.append(depsgraph_update_pre_handler)
+    handlers.depsgraph_update_post.append(depsgraph_update_post_handler)
     handlers.undo_post.append(undo_post)
+    handlers.load_post.append(load_post)
+    # The data can't be accessed while the addon is being registered
+    bpy.app.timers.register(rebuild_material_snapshot)
 
 
 def unregister():
-    for handler in list(handlers.depsgraph_update_pre):
-        if handler.__name__ == depsgraph_update_pre_handler.__name__:
-            handlers.depsgraph_update_pre.remove(handler)
-    for handler in list(handlers.undo_post):
-        if handler.__name__ == undo_post.__name__:
-            handlers.undo_post.remove(handler)
-
-    global prev_materials
+    for handler_list, function in (
+        (handlers.depsgraph_update_pre, depsgraph_update_pre_handler),
+        (handlers.depsgraph_update_post, depsgraph_update_post_handler),
+        (handlers.undo_post, undo_post),
+        (handlers.load_post, load_post),
+    ):
+        for handler in list(handler_list):
+            if handler.__name__ == function.__name__:
+                handler_list.remove(handler)
+
     global prev_world
-    prev_materials = {}
+    prev_materials.clear()
+    id_counts.clear()
     prev_world = None
@@ -3,6 +3,7 @@ from time import sleep
 from uuid import uuid1
 from typing import Dict, Callable
 from threading import Thread
+from concurrent.futures import CancelledError
 
 import bpy
 from bpy.types import ID, World, Object, Context, Material, Collection, MaterialSlot
@@ -11,11 +12,12 @@ from mathutils import Vector as V
 from ..api import get_asset_lists
 from .btypes import ExecContext
 from .general import check_internet, copy_bl_properties
-from .library import get_dir_size
 from .process import format_traceback
+from .scheduler import Priority, scheduler
 from ..settings import get_ab_settings, get_asset_settings, get_ab_scene_settings
 from ..constants import ASSET_VERSIONS, ServerError503
 from .main_thread import force_ui_update, run_in_main_thread
+from .download_state import download_states
 from ..apis.asset_types import Asset
 from ..apis.asset_utils import HDRI
 from ..operators.op_report_message import report_message
@@ -90,7 +92,7 @@ def download_asset(
 
     ab = get_ab_settings(context)
     max_size = asset.get_download_size()
-    task.new_progress(max_size)
+    progress = task.new_progress(max_size)
     task_name = task.name
 
     if draw:
@@ -125,31 +127,20 @@ def download_asset(
             # For the other asset types, it's not necessary
             for file in asset.get_files():
                 os.remove(file)
-
-        def check_progress():
-            """Check to total file size of the downloading files, and update the progress accordingly"""
-            # Blender moves memory around a lot so it's best to get a new reference to the task each time.
-            # Otherwise it causes errors when importing multiple assets at once.
-            task = ab.tasks.get(task_name)
-            if not task or task.finished:
-                return None
-            if task.progress:
-                orig_progress = task.progress.progress
-                if (size := get_dir_size(asset.download_dir)) != orig_progress:
-                    task.progress.progress = size
-                    force_ui_update(area_types="VIEW_3D")
-                return 0.01
-            return None
+        download_states.invalidate(asset.list_item.ab_idname)
 
         successful = False
 
-        # Download the asset
-        bpy.app.timers.register(check_progress)
+        # Download the asset, reporting the number of bytes received to the progress as they arrive
         try:
-            asset.download_asset()
+            # Any files that the asset downloads are queued with a high priority, and can be cancelled with the task
+            with scheduler.job_context(group=task_name, priority=Priority.INTERACTIVE):
+                asset.download_asset(on_progress=progress.increment)
             successful = True
 
         # Handle errors
+        except CancelledError:
+            pass
         except ServerError503:
             asset.list_item.ab_asset_list.url
             report_message(
@@ -170,6 +161,7 @@ def download_asset(
             )
 
         del DOWNLOADING[asset.list_item.ab_idname]
+        download_states.invalidate(asset.list_item.ab_idname)
         task = ab.tasks.get(task_name)
         force_ui_update(area_types="VIEW_3D")
 
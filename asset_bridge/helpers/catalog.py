@@ -2,7 +2,7 @@ from __future__ import annotations
 
 from pathlib import Path
 from typing import Dict
-from uuid import uuid4
+from uuid import NAMESPACE_URL, uuid5
 
 """A module for working with blender_assets.cats.txt files, and the asset catalogs that they contain"""
 
@@ -117,9 +117,10 @@ class AssetCatalogFile:
         self.catalogs = {}
 
     def add_catalog(self, name, path: str = "", uuid: str = ""):
-        """Add a catalog"""
-        uuid = uuid or str(uuid4())
+        """Add a catalog. If no uuid is given, one is generated from the path, so that the same catalog always has
+        the same uuid, even if it is created separately by different processes."""
         path = path or name
+        uuid = uuid or str(uuid5(NAMESPACE_URL, f"asset_bridge/{path}"))
 
         self.catalogs[path] = AssetCatalog(uuid, path, name)
 
@@ -130,5 +131,5 @@ class AssetCatalogFile:
     def ensure_catalog_exists(self, name, path=""):
         """Ensure that a catalog exists, and if it doesn't, create one."""
         path = path or name
-        if name not in self.catalogs:
+        if path not in self.catalogs:
             self.add_catalog(name, path)
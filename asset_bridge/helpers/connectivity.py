@@ -0,0 +1,121 @@
+from time import sleep, monotonic
+from threading import Lock, Thread
+from typing import Callable
+
+from .session import get_session
+from .main_thread import run_in_main_thread
+"""Keeps track of whether the asset websites can be reached, without blocking the UI to find out.
+
+The state is checked in a background thread by sending a HEAD request to the asset hosts, and the result is cached
+for a short time, so checking whether the user is online before a download is effectively free."""
+
+# How long the cached state is trusted for before it is checked again, in seconds
+TTL = 30
+# How often to check again while offline, if there is work waiting for the connection to come back
+RETRY_INTERVAL = 5
+PROBE_TIMEOUT = 3
+
+# The hosts that are checked. Asset lists add their own urls to this when they are registered.
+PROBE_URLS = ["https://api.polyhaven.com/", "https://ambientcg.com/"]
+
+
+class ConnectivityMonitor:
+
+    def __init__(self, urls: list[str]):
+        self.urls = urls
+        # None means that the state hasn't been checked yet
+        self.online: bool | None = None
+        self.checked_at = 0
+        self._lock = Lock()
+        self._probing = False
+        self._waiting: list[tuple[Callable, tuple, dict]] = []
+
+    def add_url(self, url: str):
+        if url not in self.urls:
+            self.urls.append(url)
+
+    @property
+    def is_stale(self) -> bool:
+        return self.online is None or monotonic() - self.checked_at > TTL
+
+    def is_online(self, block: bool = False) -> bool:
+        """Return whether the asset hosts can be reached.
+        This returns the cached state immediately and refreshes it in the background if it is out of date.
+        If the state isn't known yet, it is assumed to be online, so that the actual request can fail instead,
+        unless block is True, in which case it waits for the check to finish (so don't use that in the main thread)."""
+        if self.is_stale:
+            if block:
+                self.probe()
+            else:
+                self.probe_in_background()
+        return self.online is not False
+
+    def probe(self) -> bool:
+        """Check whether any of the hosts can be reached, and update the cached state."""
+        online = False
+        for url in list(self.urls):
+            try:
+                # Any response at all means that the host can be reached
+                get_session().head(url, timeout=PROBE_TIMEOUT)
+            except Exception:
+                continue
+            online = True
+            break
+        self.set_online(online)
+        return online
+
+    def probe_in_background(self):
+        with self._lock:
+            if self._probing:
+                return
+            self._probing = True
+
+        def probe():
+            try:
+                self.probe()
+                # Keep checking until the connection is back if there is work waiting for it
+                while self._waiting and not self.online:
+                    sleep(RETRY_INTERVAL)
+                    self.probe()
+            finally:
+                with self._lock:
+                    self._probing = False
+
+        Thread(target=probe, name="ab_connectivity_probe", daemon=True).start()
+
+    def set_online(self, online: bool):
+        """Update the cached state. This can also be called when a request succeeds or fails for other reasons."""
+        self.online = online
+        self.checked_at = monotonic()
+        if online:
+            with self._lock:
+                waiting, self._waiting = self._waiting, []
+            for function, args, kwargs in waiting:
+                run_in_main_thread(function, args, kwargs)
+
+    def when_online(self, function: Callable, args=(), kwargs=None) -> bool:
+        """Run the given function in the main thread as soon as there is a connection.
+        Returns True if it was run immediately, or False if it is waiting for the connection to come back."""
+        if self.online and not self.is_stale:
+            function(*args, **(kwargs or {}))
+            return True
+        with self._lock:
+            self._waiting.append((function, args, kwargs or {}))
+        self.probe_in_background()
+        return False
+
+    def clear_waiting(self):
+        with self._lock:
+            self._waiting.clear()
+
+
+connectivity = ConnectivityMonitor(PROBE_URLS)
+
+
+def register():
+    # Find out the state while blender is starting, so that it's already known when it is first needed.
+    connectivity.probe_in_background()
+
+
+def unregister():
+    connectivity.clear_waiting()
@@ -0,0 +1,81 @@
+import os
+from time import monotonic
+from pathlib import Path
+from threading import Lock, Thread
+
+from ..constants import PART_SUFFIX
+from .main_thread import force_ui_update
+"""Remembers which quality levels of each asset have been downloaded.
+
+Checking whether a quality level has been downloaded means listing its folder, and it is checked for every quality
+level of the selected asset whenever the asset browser is redrawn, which is many times a second. Instead, each
+result is cached, and updated when a download finishes. Since the files can also be deleted by the user, results
+older than TTL are checked again in a background thread, while the draw code carries on using the cached value."""
+
+# How many seconds a cached result is used for before it is checked against the disk again
+TTL = 5
+
+
+def check_downloaded(quality_dir: Path) -> bool:
+    """Check the disk for whether the given quality folder contains a downloaded asset"""
+    try:
+        with os.scandir(quality_dir) as entries:
+            # Ignore any partial downloads, as they can be left behind if a download is interrupted
+            return any(not e.name.endswith(PART_SUFFIX) for e in entries)
+    except OSError:
+        return False
+
+
+class DownloadStateCache:
+
+    def __init__(self):
+        # (idname, quality level) -> (is downloaded, when it was checked)
+        self._states: dict[tuple[str, str], tuple[bool, float]] = {}
+        self._refreshing: set[tuple[str, str]] = set()
+        self._lock = Lock()
+
+    def is_downloaded(self, idname: str, quality_level: str, quality_dir: Path, cached: bool = True) -> bool:
+        """Get whether the given quality level of an asset has been downloaded.
+        The disk is only checked the first time, or if cached is False. Out of date results are returned as they are,
+        and checked again in the background."""
+        key = (idname, quality_level)
+        if cached and (state := self._states.get(key)):
+            downloaded, checked_at = state
+            if monotonic() - checked_at > TTL:
+                self._refresh_in_background(key, quality_dir)
+            return downloaded
+
+        downloaded = check_downloaded(quality_dir)
+        self._states[key] = (downloaded, monotonic())
+        return downloaded
+
+    def _refresh_in_background(self, key: tuple[str, str], quality_dir: Path):
+        with self._lock:
+            if key in self._refreshing:
+                return
+            self._refreshing.add(key)
+
+        def refresh():
+            try:
+                downloaded = check_downloaded(quality_dir)
+                previous = self._states.get(key)
+                self._states[key] = (downloaded, monotonic())
+            finally:
+                with self._lock:
+                    self._refreshing.discard(key)
+            if not previous or previous[0] != downloaded:
+                force_ui_update(area_types={"FILE_BROWSER", "VIEW_3D"})
+
+        Thread(target=refresh, name="ab_download_state", daemon=True).start()
+
+    def invalidate(self, idname: str = None):
+        """Forget the cached results for the given asset, or for all assets if no idname is given,
+        so that they are checked again the next time they are needed"""
+        if idname is None:
+            self._states.clear()
+            return
+        for key in [k for k in list(self._states) if k[0] == idname]:
+            self._states.pop(key, None)
+
+
+download_states = DownloadStateCache()
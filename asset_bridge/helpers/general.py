@@ -1,9 +1,6 @@
-from time import perf_counter
-
 from bpy.types import Property, PropertyGroup
 
-from ..vendor import requests
-from .process import format_traceback
+from .connectivity import connectivity
 
 
 def copy_bl_properties(from_data_block: PropertyGroup, to_data_block: PropertyGroup, print_errors=False):
@@ -68,18 +65,7 @@ def copy_bl_properties(from_data_block: PropertyGroup, to_data_block: PropertyGr
 #         conn.close()
 
 
-def check_internet(url="http://www.google.com/", timeout=5):
-    """ "
-    Check whether the user has an active internet connection
-    taken from: https://stackoverflow.com/a/33117579/18864758
-    """
-    start = perf_counter()
-    try:
-        _ = requests.head(url, timeout=timeout)
-        return True
-        print(f"{perf_counter() - start:.5f}")
-    except (requests.ConnectionError, requests.ReadTimeout) as e:
-        print(format_traceback(e))
-        return False
-        print("No internet connection available.")
-    return False
+def check_internet(block: bool = False) -> bool:
+    """Check whether the user has an active internet connection.
+    This uses the cached state of the connectivity monitor, so it returns immediately unless block is True."""
+    return connectivity.is_online(block=block)
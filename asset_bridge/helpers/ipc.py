@@ -0,0 +1,151 @@
+import sys
+import json
+import traceback
+from threading import Thread
+from subprocess import Popen
+from typing import Callable
+"""A simple channel for sending structured messages from background blender processes back to the main process.
+
+The child process writes each message as a single line of json to stdout, starting with MESSAGE_PREFIX, so that the
+messages can be told apart from anything else that blender or the script prints. The parent reads the output in a
+background thread as it arrives, so it never has to poll any files, and the pipe can never fill up and block the child.
+
+This module only uses the standard library, so that it can be imported by the scripts run in the child processes."""
+
+MESSAGE_PREFIX = "\x1eAB_IPC:"
+
+# Message types
+PROGRESS = "progress"
+LOG = "log"
+ERROR = "error"
+# Sent during long running steps that don't have any progress to report, to show that the process hasn't stalled
+HEARTBEAT = "heartbeat"
+# Used by worker processes to say that they are ready for a job, and that a job has finished
+READY = "ready"
+JOB_DONE = "job_done"
+
+
+# Child process side
+
+
+def send(message_type: str, **data):
+    """Send a message to the parent process"""
+    data["type"] = message_type
+    sys.stdout.write(MESSAGE_PREFIX + json.dumps(data) + "\n")
+    sys.stdout.flush()
+
+
+def send_progress(value: int):
+    send(PROGRESS, value=value)
+
+
+def send_heartbeat():
+    send(HEARTBEAT)
+
+
+def send_log(message: str):
+    send(LOG, message=message)
+
+
+def send_error(message: str, traceback_str: str = ""):
+    send(ERROR, message=message, traceback=traceback_str)
+
+
+def report_uncaught_exceptions():
+    """Send any uncaught exceptions in the child process to the parent as error messages.
+    Blender calls sys.excepthook when a script fails, so this catches errors anywhere in the script."""
+    original_hook = sys.excepthook
+
+    def excepthook(exc_type, exc_value, exc_traceback):
+        formatted = "".join(traceback.format_exception(exc_type, exc_value, exc_traceback))
+        send_error(f"{exc_type.__name__}: {exc_value}", formatted)
+        original_hook(exc_type, exc_value, exc_traceback)
+
+    sys.excepthook = excepthook
+
+
+# Parent process side
+
+
+class ProcessChannel:
+    """Reads the messages sent by a child process.
+    The process needs to have been created with its stdout piped (use_stdout=True in new_blender_process)."""
+
+    def __init__(
+        self,
+        process: Popen,
+        on_message: Callable[[dict], None] = None,
+        on_output: Callable[[str], None] = None,
+    ):
+        self.process = process
+        self.on_message = on_message
+        self.on_output = on_output
+        self.progress = 0
+        self.errors: list[dict] = []
+        self.logs: list[str] = []
+        # All other output from the process, such as prints from blender itself
+        self.output: list[str] = []
+
+        self._thread = Thread(target=self._read, daemon=True)
+        self._thread.start()
+
+    def _read(self):
+        for line in iter(self.process.stdout.readline, b""):
+            line = line.decode(errors="replace").rstrip("\r\n")
+            message = None
+            if line.startswith(MESSAGE_PREFIX):
+                try:
+                    message = json.loads(line[len(MESSAGE_PREFIX):])
+                except json.JSONDecodeError:
+                    pass
+
+            if message is None:
+                self.output.append(line)
+                if self.on_output:
+                    self.on_output(line)
+                continue
+
+            message_type = message.get("type")
+            if message_type == PROGRESS:
+                self.progress = message["value"]
+            elif message_type == LOG:
+                self.logs.append(message["message"])
+            elif message_type == ERROR:
+                self.errors.append(message)
+
+            if self.on_message:
+                self.on_message(message)
+
+    @property
+    def finished(self) -> bool:
+        """Whether the process has exited and all of its output has been read"""
+        return self.process.poll() is not None and not self._thread.is_alive()
+
+    @property
+    def failed(self) -> bool:
+        """Whether the process reported an error, or exited with a non zero exit code.
+        (Blender processes need to be run with --python-exit-code for script errors to set the exit code)"""
+        return bool(self.errors) or (self.process.poll() not in {None, 0})
+
+    @property
+    def error_message(self) -> str:
+        """A description of what went wrong, for showing to the user"""
+        if self.errors:
+            return "\n".join(e.get("traceback") or e["message"] for e in self.errors)
+        if self.failed:
+            # The process failed without sending an error (for example if it crashed), so show the end of the output.
+            return f"Process exited with code {self.process.returncode}:\n" + "\n".join(self.output[-20:])
+        return ""
+
+    def wait(self, timeout: float = None) -> int:
+        """Wait for the process to exit and for all of its output to be read, and return the exit code"""
+        returncode = self.process.wait(timeout)
+        self._thread.join(timeout)
+        return returncode
+
+    def get_log(self) -> str:
+        """Get the full output of the process, including messages"""
+        lines = list(self.output)
+        lines += [f"LOG: {log}" for log in self.logs]
+        lines += [f"ERROR: {e.get('traceback') or e['message']}" for e in self.errors]
+        return "\n".join(lines)
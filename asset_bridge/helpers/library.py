@@ -1,6 +1,9 @@
 import os
+import json
+import zlib
 from pathlib import Path
-from ..constants import ASSET_LIB_NAME, DIRS
+from ..constants import ASSET_LIB_NAME, DIRS, FILES
+from .worker_pool import MAX_WORKERS
 
 import bpy
 
@@ -40,6 +43,51 @@ def ensure_bl_asset_library_exists():
         bpy.ops.wm.save_userpref()
 
 
+# The minimum number of assets in each shard of the dummy asset library.
+# Below this, the time taken to start another blender process outweighs the time saved.
+MIN_SHARD_SIZE = 250
+
+
+def compute_shard_count(num_assets: int) -> int:
+    """Get the number of shards that the dummy assets for an asset list should be split into.
+    Each shard is set up by a separate worker process, so this is limited by the number of workers."""
+    return max(1, min(MAX_WORKERS, num_assets // MIN_SHARD_SIZE))
+
+
+def load_shard_counts() -> dict[str, int]:
+    """Get the number of shards that each asset list was last set up with"""
+    try:
+        with open(FILES.shard_counts, "r") as f:
+            return json.load(f)
+    except (AttributeError, OSError, json.JSONDecodeError):
+        return {}
+
+
+def save_shard_counts(shard_counts: dict[str, int]):
+    with open(FILES.shard_counts, "w") as f:
+        json.dump(shard_counts, f)
+
+
+def get_shard_count(asset_list_name: str, num_assets: int) -> int:
+    """Get the number of shards that the dummy assets for an asset list are split into.
+    Changing the number of shards moves almost every asset to a different shard, which means rebuilding the whole
+    list, so once a list has been set up, its shard count is kept until the library is rebuilt from scratch,
+    rather than changing whenever the list grows or the library is used on a machine with a different cpu count."""
+    return load_shard_counts().get(asset_list_name) or compute_shard_count(num_assets)
+
+
+def get_shard_name(asset_list_name: str, shard: int, shards: int) -> str:
+    """Get the name of the blend file (without the extension) for a shard of the dummy asset library.
+    The number of shards is included so that files left over from a different number of shards can be found."""
+    return asset_list_name if shards == 1 else f"{asset_list_name}_{shard + 1}-{shards}"
+
+
+def get_asset_shard(idname: str, shards: int) -> int:
+    """Get the shard that an asset belongs to. This always gives the same result for the same number of shards,
+    so that each shard can be updated incrementally."""
+    return zlib.crc32(idname.encode()) % shards
+
+
 sizes = ("", "KB", "MB", "GB", "TB")
 
 
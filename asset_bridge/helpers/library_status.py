@@ -0,0 +1,112 @@
+from time import monotonic, sleep
+from threading import Lock, Thread
+from dataclasses import dataclass, field
+
+from ..constants import DIRS
+from .library import get_shard_count, get_shard_name
+from .main_thread import force_ui_update
+from .preview_manifest import preview_manifest
+"""A cached summary of the state of the asset library, for drawing the preferences.
+
+Working out which previews are missing and whether the library has been set up means going over every asset and
+looking at the library folder, which is far too slow to do on every redraw. Instead, the status is computed in a
+background thread whenever it is invalidated (when an asset list changes, previews are downloaded, or the library
+is set up), and the draw code only reads the most recent result."""
+
+# The minimum time between recomputing the status, so that lots of changes in a row only recompute it once
+MIN_INTERVAL = 0.5
+
+
+@dataclass
+class LibraryStatus:
+    all_initialized: bool = False
+    total_assets: int = 0
+    preview_count: int = 0
+    # The idnames of the assets whose previews are missing or out of date
+    missing_previews: list[str] = field(default_factory=list)
+    # Whether every asset list has all of the dummy asset blend files for its shards
+    dummy_assets_set_up: bool = False
+
+    @property
+    def new_assets_available(self) -> int:
+        return len(self.missing_previews)
+
+
+class LibraryStatusCache:
+
+    def __init__(self):
+        self._status: LibraryStatus | None = None
+        self._dirty = True
+        self._computing = False
+        self._lock = Lock()
+        self._last_computed = 0
+
+    def get(self) -> LibraryStatus:
+        """Get the most recent status, and start recomputing it in the background if it is out of date.
+        The first time this is called, the status is computed immediately, so that there is something to draw."""
+        if self._status is None:
+            self._dirty = False
+            self._status = self.compute()
+        elif self._dirty:
+            self._compute_in_background()
+        return self._status
+
+    def invalidate(self):
+        """Mark the status as out of date. It is recomputed in the background if it has been drawn before."""
+        self._dirty = True
+        if self._status is not None:
+            self._compute_in_background()
+
+    def _compute_in_background(self):
+        with self._lock:
+            if self._computing:
+                return
+            self._computing = True
+
+        def compute():
+            try:
+                # Keep going until no more changes have been made while computing
+                while self._dirty:
+                    if (wait := MIN_INTERVAL - (monotonic() - self._last_computed)) > 0:
+                        sleep(wait)
+                    self._dirty = False
+                    self._status = self.compute()
+            finally:
+                with self._lock:
+                    self._computing = False
+            # It could have been invalidated again just after the loop finished
+            if self._dirty:
+                self._compute_in_background()
+            else:
+                force_ui_update(area_types={"PREFERENCES"})
+
+        Thread(target=compute, name="ab_library_status", daemon=True).start()
+
+    def compute(self) -> LibraryStatus:
+        from ..api import get_asset_lists
+
+        self._last_computed = monotonic()
+        asset_lists = get_asset_lists()
+        all_initialized = asset_lists.all_initialized
+        all_assets = asset_lists.all_assets
+        return LibraryStatus(
+            all_initialized=all_initialized,
+            total_assets=len(all_assets),
+            preview_count=len(preview_manifest),
+            missing_previews=preview_manifest.missing(list(all_assets.values())),
+            dummy_assets_set_up=self.dummy_assets_set_up(asset_lists),
+        )
+
+    def dummy_assets_set_up(self, asset_lists) -> bool:
+        """Check that the blend file for each shard of each asset list exists"""
+        if not (dummy_assets := getattr(DIRS, "dummy_assets", None)) or not dummy_assets.exists():
+            return False
+        files = {f.name for f in dummy_assets.iterdir()}
+        for name, asset_list in asset_lists.items():
+            shards = get_shard_count(name, len(asset_list.assets))
+            if any(f"{get_shard_name(name, shard, shards)}.blend" not in files for shard in range(shards)):
+                return False
+        return True
+
+
+library_status = LibraryStatusCache()
@@ -0,0 +1,91 @@
+import os
+import json
+import pickle
+from time import time
+from pathlib import Path
+"""A module for reading and writing the cached raw data of the asset lists.
+
+The data is stored as a versioned pickle, which is compact and much faster to load than the indented json files
+that were used previously. Those are still read as a fallback, and are converted the first time they are loaded."""
+
+# Increment this whenever the layout of the cached data changes, so that old caches are ignored.
+CACHE_VERSION = 1
+PICKLE_PROTOCOL = 5
+
+
+class AssetListCache:
+    """Represents the cached data for a single asset list, along with the info needed to check if it is out of date."""
+
+    def __init__(self, cache_dir: Path, name: str):
+        self.name = name
+        self.file = Path(cache_dir) / f"{name}.cache"
+        self.json_file = Path(cache_dir) / f"{name}.json"
+
+        # The HTTP validators (ETag, Last-Modified) of the source that the data was downloaded from
+        self.validators: dict[str, str] = {}
+        # The time at which the data was downloaded
+        self.timestamp: float = 0
+
+    def exists(self) -> bool:
+        return self.file.exists() or self.json_file.exists()
+
+    def read(self) -> dict:
+        """Read the cached data, falling back to the old json format if needed.
+        Returns an empty dict if no valid data is found."""
+        data = self.read_binary()
+        if data is None:
+            data = self.read_json()
+            if data:
+                # Convert to the new format so that the json doesn't need to be parsed again.
+                self.write(data)
+        return data or {}
+
+    def read_binary(self) -> dict | None:
+        if not self.file.exists():
+            return None
+
+        try:
+            with open(self.file, "rb") as f:
+                contents = pickle.load(f)
+        except Exception as e:
+            # A corrupted or partially written file can raise pretty much anything here.
+            print(f"Asset Bridge: Could not read asset list cache '{self.file.name}': {e}")
+            return None
+
+        if not isinstance(contents, dict) or contents.get("version") != CACHE_VERSION:
+            return None
+
+        self.validators = contents.get("validators", {})
+        self.timestamp = contents.get("timestamp", 0)
+        return contents["data"]
+
+    def read_json(self) -> dict | None:
+        if not self.json_file.exists():
+            return None
+
+        with open(self.json_file, "r") as f:
+            try:
+                data = json.load(f)
+            except json.JSONDecodeError:
+                return None
+
+        self.validators = {}
+        self.timestamp = os.path.getmtime(self.json_file)
+        return data
+
+    def write(self, data: dict, validators: dict[str, str] = None):
+        """Write the data to the disk. This is done via a temporary file so that the cache is never left half written"""
+        self.validators = validators or {}
+        self.timestamp = time()
+        contents = {
+            "version": CACHE_VERSION,
+            "name": self.name,
+            "timestamp": self.timestamp,
+            "validators": self.validators,
+            "data": data,
+        }
+
+        temp_file = self.file.with_suffix(".cache.tmp")
+        with open(temp_file, "wb") as f:
+            pickle.dump(contents, f, protocol=PICKLE_PROTOCOL)
+        os.replace(temp_file, self.file)
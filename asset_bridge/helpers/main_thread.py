@@ -1,59 +1,213 @@
+import traceback
+from time import perf_counter
+from threading import Lock
+from collections import deque
+from typing import Callable, Hashable
+
 import bpy
-from queue import Queue
 
+# The maximum time spent running queued functions each time the timer runs, so that a big backlog of work
+# doesn't freeze the UI. Anything left over is run on the next tick.
+TICK_BUDGET = 0.008
+# How often the queue is checked when it is empty. The interval starts at IDLE_INTERVAL, so that work that comes
+# in bursts (like progress updates from a download) is picked up quickly, and doubles each time the timer runs with
+# nothing to do, up to MAX_IDLE_INTERVAL, so that blender isn't woken up many times a second while the addon is idle.
+# Blender timers can only be registered from the main thread, so submitting work can't wake the timer directly.
+IDLE_INTERVAL = 0.02
+MAX_IDLE_INTERVAL = 0.25
+# The maximum number of times per second that redraws requested with force_ui_update are done
+REDRAW_RATE = 30
+
+
+class MainThreadDispatcher:
+    """It's a bad idea to modify blend data in arbitrary threads, so if those threads want to do so,
+    they can add a function to the queue, which is then executed in the main thread by a single persistent timer.
+
+    Functions can be submitted with a key, in which case, if there is already a function waiting with the same key,
+    it is replaced rather than being queued again. This means that things like setting a property many times a second
+    from a download thread only do the work once per tick."""
+
+    def __init__(self, budget: float = TICK_BUDGET):
+        self.budget = budget
+        # Each task is [function, args, kwargs, key, time submitted]
+        self._queue: deque[list] = deque()
+        self._pending: dict[Hashable, list] = {}
+        self._lock = Lock()
+        self._idle_interval = IDLE_INTERVAL
+
+        # Metrics
+        self.processed = 0
+        self.coalesced = 0
+        self.max_depth = 0
+        self.total_latency = 0.
+        self.max_latency = 0.
+
+    def wake(self):
+        """Go back to checking the queue often, as more work is expected soon"""
+        self._idle_interval = IDLE_INTERVAL
+
+    def submit(self, function: Callable, args=(), kwargs: dict = None, key: Hashable = None):
+        self.wake()
+        with self._lock:
+            if key is not None and (task := self._pending.get(key)):
+                # Keep the original place in the queue, but use the latest arguments
+                task[0], task[1], task[2] = function, args, kwargs or {}
+                self.coalesced += 1
+                return
+            task = [function, args, kwargs or {}, key, perf_counter()]
+            self._queue.append(task)
+            if key is not None:
+                self._pending[key] = task
+            self.max_depth = max(self.max_depth, len(self._queue))
 
-# It's a bad idea to modify blend data in arbitrary threads,
-# so if those threads want to do so, they can add a function to the queue
-# which will then be executed on the main thread based on a timer
-main_thread_queue = Queue()
+    def tick(self) -> float:
+        """Run queued functions until the queue is empty or the time budget is used up,
+        and return the time until the next tick"""
+        start = perf_counter()
+        while perf_counter() - start < self.budget:
+            with self._lock:
+                if not self._queue:
+                    break
+                function, args, kwargs, key, submitted = task = self._queue.popleft()
+                if key is not None and self._pending.get(key) is task:
+                    del self._pending[key]
+
+            latency = perf_counter() - submitted
+            self.total_latency += latency
+            self.max_latency = max(self.max_latency, latency)
+            self.processed += 1
+            try:
+                function(*args, **kwargs)
+            except Exception:
+                # Don't let one failing function stop everything else from running
+                traceback.print_exc()
+
+        if self._queue:
+            return 0
+        interval = self._idle_interval
+        self._idle_interval = min(interval * 2, MAX_IDLE_INTERVAL)
+        return interval
+
+    @property
+    def depth(self) -> int:
+        return len(self._queue)
+
+    def get_stats(self) -> dict[str, float]:
+        return {
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+            "processed": self.processed,
+            "coalesced": self.coalesced,
+            "average_latency_ms": self.total_latency / max(self.processed, 1) * 1000,
+            "max_latency_ms": self.max_latency * 1000,
+        }
+
+
+dispatcher = MainThreadDispatcher()
 
 
 def main_thread_timer():
-    """Go through the functions in the queue and execute them.
-    This is checked every n seconds, where n is the return value"""
-    while not main_thread_queue.empty():
-        func, args, kwargs = main_thread_queue.get()
-        func(*args, **kwargs)
+    interval = dispatcher.tick()
+    return min(interval, redraw_scheduler.update())
 
 
-def run_in_main_thread(function, args=(), kwargs=None):
+def run_in_main_thread(function, args=(), kwargs=None, key: Hashable = None):
     """Run the given function in the main thread when it is next available.
     This is useful because it is usually a bad idea to modify blend data at arbitrary times on separate threads,
-    as this can causes weird error messages, and even crashes."""
-    if kwargs is None:
-        kwargs = {}
-    main_thread_queue.put((function, args, kwargs))
-    bpy.app.timers.register(main_thread_timer)
+    as this can causes weird error messages, and even crashes.
+    If a key is given, and a function with the same key is already waiting to be run, it is replaced by this one."""
+    dispatcher.submit(function, args, kwargs, key)
+
+
+def get_data_key(data) -> int:
+    """Get a key that identifies a blender struct, even if it is accessed through different python objects"""
+    return data.as_pointer() if hasattr(data, "as_pointer") else id(data)
 
 
 def update_prop(data, name, value):
-    """Update a single blender property in the main thread"""
-    run_in_main_thread(setattr, (data, name, value))
-
-
-def ui_update_timer(area, area_types, region_types):
-    """Update all given areas, in the main thread"""
-    if not isinstance(area_types, set):
-        area_types = {area_types}
-    if not isinstance(region_types, set):
-        area_types = {region_types}
-    areas = []
-    if area:
-        areas = [area]
-    else:
-        for window in bpy.context.window_manager.windows:
-            for area in window.screen.areas:
-                if area.type not in area_types:
-                    continue
-                areas.append(area)
-    for area in areas:
-        for region in area.regions:
-            if region.type not in region_types:
+    """Update a single blender property in the main thread.
+    Only the most recent value is set if it is updated several times before the main thread gets to it."""
+    run_in_main_thread(setattr, (data, name, value), key=("setattr", get_data_key(data), name))
+
+
+class RedrawScheduler:
+    """Collects redraw requests, and redraws everything that was requested in one pass, at most REDRAW_RATE times
+    per second. Background tasks can ask for a redraw every time they make progress, which would otherwise mean
+    going over every window, area and region hundreds of times per second."""
+
+    def __init__(self, rate: float = REDRAW_RATE):
+        self.interval = 1 / rate
+        self._lock = Lock()
+        self._area_types: set[str] = set()
+        self._region_types: set[str] = set()
+        # Specific areas to redraw, by pointer
+        self._areas: dict[int, bpy.types.Area] = {}
+        self._pending = False
+        self._last_redraw = 0.
+
+    def request(self, area=None, area_types: set[str] | str = (), region_types: set[str] | str = ()):
+        area_types = {area_types} if isinstance(area_types, str) else set(area_types)
+        region_types = {region_types} if isinstance(region_types, str) else set(region_types)
+        with self._lock:
+            if area:
+                self._areas[get_data_key(area)] = area
+            else:
+                self._area_types |= area_types
+            self._region_types |= region_types
+            self._pending = True
+        dispatcher.wake()
+
+    def update(self) -> float:
+        """Redraw if there are requests and enough time has passed since the last redraw.
+        Returns the time until the next redraw can happen, for use as a timer interval."""
+        if not self._pending:
+            return MAX_IDLE_INTERVAL
+        if (wait := self._last_redraw + self.interval - perf_counter()) > 0:
+            return wait
+
+        with self._lock:
+            areas = list(self._areas.values())
+            area_types, region_types = self._area_types, self._region_types
+            self._areas, self._area_types, self._region_types = {}, set(), set()
+            self._pending = False
+        self._last_redraw = perf_counter()
+
+        try:
+            self._redraw(areas, area_types, region_types)
+        except Exception:
+            # This runs in the same timer as the main thread queue, so an error here mustn't stop the timer
+            traceback.print_exc()
+        return MAX_IDLE_INTERVAL
+
+    def _redraw(self, areas: list[bpy.types.Area], area_types: set[str], region_types: set[str]):
+        if area_types:
+            for window in bpy.context.window_manager.windows:
+                areas += [area for area in window.screen.areas if area.type in area_types]
+        for area in areas:
+            try:
+                for region in area.regions:
+                    if region.type in region_types:
+                        region.tag_redraw()
+            except ReferenceError:
+                # The area has been closed since it was requested
                 continue
-            region.tag_redraw()
-    bpy.context.workspace.status_text_set_internal(None)
+        if workspace := bpy.context.workspace:
+            workspace.status_text_set_internal(None)
+
+
+redraw_scheduler = RedrawScheduler()
 
 
 def force_ui_update(area=None, area_types={"VIEW_3D", "PREFERENCES"}, region_types={"WINDOW", "UI"}):
-    """Sometimes calling tag_redraw doesn't work, but doing it in a timer does"""
-    run_in_main_thread(ui_update_timer, args=(area, area_types, region_types))
+    """Redraw the given area, or all areas of the given types, the next time the redraw scheduler runs.
+    (Sometimes calling tag_redraw directly doesn't work, but doing it in a timer does)"""
+    redraw_scheduler.request(area, area_types, region_types)
+
+
+def register():
+    bpy.app.timers.register(main_thread_timer, first_interval=0, persistent=True)
+
+
+def unregister():
+    if bpy.app.timers.is_registered(main_thread_timer):
+        bpy.app.timers.unregister(main_thread_timer)
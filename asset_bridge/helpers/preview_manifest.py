@@ -0,0 +1,189 @@
+import os
+import json
+import hashlib
+from time import time
+from pathlib import Path
+from tempfile import NamedTemporaryFile
+from threading import RLock, Thread
+from typing import TYPE_CHECKING, Iterable, NamedTuple
+
+import bpy
+
+from ..constants import DIRS, FILES
+
+if TYPE_CHECKING:
+    from ..apis.asset_types import AssetListItem
+"""Keeps a record of every asset preview that has been downloaded, so that checking which previews are missing
+doesn't need to list the previews folder, which used to happen on every redraw of the preferences.
+
+Previews are only added to the manifest once they have been completely downloaded and checked to be a valid image,
+so files from failed downloads are treated as missing. If the folder has been changed by something other than the
+addon since the manifest was saved (for example if the user deleted it), the manifest is rebuilt from the files.
+Only the main blender instance writes the manifest. Background worker processes can read it, but never save it."""
+
+MANIFEST_VERSION = 1
+# The number of changes that can be made before the manifest is saved automatically
+SAVE_INTERVAL = 200
+# The first bytes of the image formats that the previews can be in.
+# (ambientCG previews are jpgs, even though they are saved with a .png suffix)
+IMAGE_SIGNATURES = (b"\x89PNG\r\n\x1a\n", b"\xff\xd8\xff")
+
+# Preview states
+OK = "OK"
+MISSING = "MISSING"
+# The preview was downloaded from a different url to the one that the asset now uses
+STALE = "STALE"
+
+
+class PreviewEntry(NamedTuple):
+    size: int
+    md5: str
+    url: str
+    fetched_at: float
+
+
+def is_image_data(data: bytes) -> bool:
+    return data.startswith(IMAGE_SIGNATURES)
+
+
+class PreviewManifest:
+
+    def __init__(self, file: Path, previews_dir: Path):
+        self.file = Path(file)
+        self.previews_dir = Path(previews_dir)
+        self.entries: dict[str, PreviewEntry] = {}
+        self._lock = RLock()
+        self._loaded = False
+        self._unsaved = 0
+
+    def _ensure_loaded(self):
+        if self._loaded:
+            return
+        with self._lock:
+            if not self._loaded:
+                self.load()
+
+    def load(self):
+        """Read the manifest from the disk, and rebuild it if the previews folder has changed since it was saved"""
+        with self._lock:
+            contents = {}
+            if self.file.exists():
+                try:
+                    with open(self.file, "r") as f:
+                        contents = json.load(f)
+                except (OSError, json.JSONDecodeError) as e:
+                    print(f"Asset Bridge: Could not read preview manifest: {e}")
+
+            if contents.get("version") == MANIFEST_VERSION:
+                self.entries = {k: PreviewEntry(*v) for k, v in contents["entries"].items()}
+            else:
+                self.entries = {}
+            if contents.get("folder_mtime") != self._folder_mtime():
+                self.reconcile()
+            self._loaded = True
+
+    def _folder_mtime(self) -> int:
+        return os.stat(self.previews_dir).st_mtime_ns if self.previews_dir.exists() else 0
+
+    def reconcile(self):
+        """Make the manifest match the files in the previews folder.
+        Entries for files that no longer exist, or that have changed size, are removed, and valid images that aren't
+        in the manifest are added, without a url, as it isn't known which url they were downloaded from."""
+        files: dict[str, os.DirEntry] = {}
+        if self.previews_dir.exists():
+            files = {e.name[:-len(".png")]: e for e in os.scandir(self.previews_dir) if e.name.endswith(".png")}
+
+        with self._lock:
+            for idname, entry in list(self.entries.items()):
+                if not (file := files.get(idname)) or file.stat().st_size != entry.size:
+                    del self.entries[idname]
+
+            for idname, file in files.items():
+                if idname in self.entries:
+                    continue
+                try:
+                    with open(file.path, "rb") as f:
+                        valid = is_image_data(f.read(8))
+                    stat = file.stat()
+                except OSError:
+                    continue
+                if valid:
+                    self.entries[idname] = PreviewEntry(stat.st_size, "", "", stat.st_mtime)
+            self.save()
+
+    def save(self):
+        """Write the manifest to the disk via a temporary file, so that it is never left half written"""
+        if bpy.app.background:
+            return
+        with self._lock:
+            contents = {
+                "version": MANIFEST_VERSION,
+                "folder_mtime": self._folder_mtime(),
+                "entries": self.entries,
+            }
+            # Use a unique temporary file, so that saves from different processes can't write to the same one
+            with NamedTemporaryFile("w", dir=self.file.parent, suffix=".tmp", delete=False) as f:
+                json.dump(contents, f)
+            os.replace(f.name, self.file)
+            self._unsaved = 0
+
+    def record(self, idname: str, file: Path, url: str = "") -> bool:
+        """Add a preview that has just been downloaded to the manifest.
+        Returns False if the file isn't a valid image, in which case it is deleted, so that it is downloaded again."""
+        self._ensure_loaded()
+        try:
+            data = Path(file).read_bytes()
+        except OSError:
+            data = b""
+
+        with self._lock:
+            if not is_image_data(data):
+                self.entries.pop(idname, None)
+                Path(file).unlink(missing_ok=True)
+                return False
+
+            self.entries[idname] = PreviewEntry(len(data), hashlib.md5(data).hexdigest(), url, time())
+            self._unsaved += 1
+            if self._unsaved >= SAVE_INTERVAL:
+                self.save()
+        return True
+
+    def status(self, asset: "AssetListItem") -> str:
+        """Get whether the preview for the given asset is OK, MISSING or STALE, without touching the disk"""
+        self._ensure_loaded()
+        if not (entry := self.entries.get(asset.ab_idname)):
+            return MISSING
+        if entry.url and entry.url != asset.get_preview_url():
+            return STALE
+        return OK
+
+    def needs_download(self, asset: "AssetListItem") -> bool:
+        return self.status(asset) != OK
+
+    def missing(self, assets: Iterable["AssetListItem"]) -> list[str]:
+        """Return the idnames of the given assets whose previews are missing or out of date"""
+        return [asset.ab_idname for asset in assets if self.needs_download(asset)]
+
+    def __len__(self):
+        self._ensure_loaded()
+        return len(self.entries)
+
+    def __contains__(self, idname: str):
+        self._ensure_loaded()
+        return idname in self.entries
+
+
+preview_manifest = PreviewManifest(FILES.preview_manifest, DIRS.previews)
+
+
+def register():
+    # Background worker processes don't need the manifest, and shouldn't reconcile it while the main process uses it
+    if bpy.app.background:
+        return
+    # Loading can involve checking every preview file if the folder has changed, so do it in the background
+    Thread(target=preview_manifest.load, daemon=True).start()
+
+
+def unregister():
+    if preview_manifest._unsaved and not bpy.app.background:
+        preview_manifest.save()
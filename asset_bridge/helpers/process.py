@@ -12,8 +12,10 @@ def new_blender_process(
     factory: bool = True,
     background: bool = True,
     use_stdout: bool = True,
+    use_stdin: bool = False,
 ) -> subprocess.Popen:
-    """Create a new blender process and return a reference to it"""
+    """Create a new blender process and return a reference to it.
+    If use_stdout is True, stdout and stderr are piped back to this process, and can be read with an ipc.ProcessChannel"""
 
     if script_args is None:
         script_args = []
@@ -28,7 +30,9 @@ def new_blender_process(
     if background:
         args.append("-b")
 
-    kwargs = {"stdout": subprocess.PIPE} if use_stdout else {}
+    kwargs = {"stdout": subprocess.PIPE, "stderr": subprocess.STDOUT} if use_stdout else {}
+    if use_stdin:
+        kwargs["stdin"] = subprocess.PIPE
 
     return subprocess.Popen([bpy.app.binary_path, *args, "--python-exit-code", "1", "--python", script, *script_args], **kwargs)
 
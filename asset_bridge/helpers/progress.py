@@ -1,18 +1,34 @@
-from .main_thread import update_prop, force_ui_update
+from time import perf_counter
+from threading import Lock
+from typing import Callable
+
+from .main_thread import run_in_main_thread, force_ui_update
+
+# The maximum number of times per second that a change in progress will be shown in the UI.
+UI_UPDATE_RATE = 30
 
 
 class Progress:
-    """Used to keep track of the progress of a task, usually downloading an asset."""
+    """Used to keep track of the progress of a task, usually downloading an asset.
+    The progress can be updated from any thread, but changes are only pushed to the UI at a fixed rate,
+    so that it can be incremented for every chunk of data that is downloaded without flooding the main thread."""
 
     data = None
     propname = ""
 
-    def __init__(self, max, data=None, propname=""):
+    def __init__(self, max, data=None, propname="", get_data: Callable = None):
         self.max = max
         self.data = data or self.data
         self.propname = propname or self.propname
+        # Blender data can be moved in memory (for example when items are added to a collection property), so if
+        # given, this is used to get a new reference to the data each time the properties are set in the main thread.
+        self.get_data = get_data
         self.message = ""
         self.cancelled = False
+        self._lock = Lock()
+        self._last_update = 0
+        # The last value sent to the UI, so that the blender data doesn't need to be read from other threads
+        self._shown_value = None
         self.progress = 0
         setattr(self.data, f"{self.propname}_active", True)
 
@@ -22,25 +38,50 @@ class Progress:
 
     @progress.setter
     def progress(self, value):
-        self._progress = value
+        with self._lock:
+            self._progress = value
+        self.update_ui()
+
+    def increment(self, value=1):
+        """Add to the progress. This is thread safe, so can be used as a callback by multiple threads at once"""
+        with self._lock:
+            self._progress += value
+        self.update_ui()
+
+    def update_ui(self, force=False):
+        """Show the current progress in the UI, if enough time has passed since it was last shown."""
+        now = perf_counter()
+        finished = self._progress in {0, self.max}
+        if not (force or finished or now - self._last_update > 1 / UI_UPDATE_RATE):
+            return
+        self._last_update = now
         prop_val = self.read()
-        if getattr(self.data, self.propname) != prop_val:
-            update_prop(self.data, self.propname, prop_val)
+        if prop_val != self._shown_value:
+            self._shown_value = prop_val
+            self._update_prop(self.propname, prop_val)
             force_ui_update()
 
-    def increment(self, value=1):
-        self.progress += value
+    def _update_prop(self, name, value):
+        """Set one of the progress properties in the main thread.
+        Only the most recent value is set if it is updated several times before the main thread gets to it."""
+
+        def set_prop():
+            data = self.get_data() if self.get_data else self.data
+            if data is not None:
+                setattr(data, name, value)
+
+        run_in_main_thread(set_prop, key=("progress", id(self), name))
 
     def read(self):
         return self.progress / self.max * 100
 
     def end(self):
         """Reset the progress properties"""
-        update_prop(self.data, f"{self.propname}_active", False)
+        self._update_prop(f"{self.propname}_active", False)
         self._progress = 0
         self.__class__.data = None
         self.__class__.propname = ""
 
     def cancel(self):
-        update_prop(self.data, f"{self.propname}_active", False)
+        self._update_prop(f"{self.propname}_active", False)
         self.cancelled = True
\ No newline at end of file
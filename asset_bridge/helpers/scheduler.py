@@ -0,0 +1,206 @@
+from enum import IntEnum
+from threading import Condition, Thread, current_thread, local
+from contextlib import contextmanager
+from collections import OrderedDict, defaultdict, deque
+from concurrent.futures import Future
+from urllib.parse import urlparse
+from typing import Callable
+
+from .session import MAX_WORKERS
+"""A single scheduler that all downloads are run through, so that the number of concurrent connections is bounded,
+no matter how many assets, previews or lists are being downloaded at once.
+
+Jobs are run in order of priority, and jobs with the same priority are taken in turn from each group
+(usually the name of the task that submitted them), so that one large task can't starve the others."""
+
+# The maximum number of jobs that can connect to the same host at once.
+MAX_PER_HOST = 8
+
+
+class Priority(IntEnum):
+    """The priority of a download job. Lower values are run first."""
+
+    # Things the user is actively waiting on, like importing an asset or loading the asset lists
+    INTERACTIVE = 0
+    # High resolution previews of a single asset
+    PREVIEW = 1
+    # Bulk downloads like the thumbnails for the whole library
+    BULK = 2
+
+
+class Job:
+    __slots__ = ("function", "args", "kwargs", "host", "group", "future")
+
+    def __init__(self, function: Callable, args: tuple, kwargs: dict, host: str, group: str):
+        self.function = function
+        self.args = args
+        self.kwargs = kwargs
+        self.host = host
+        self.group = group
+        self.future = Future()
+
+    def run(self):
+        # This returns False if the job was cancelled while queued
+        if not self.future.set_running_or_notify_cancel():
+            return
+        try:
+            result = self.function(*self.args, **self.kwargs)
+        except BaseException as e:
+            self.future.set_exception(e)
+        else:
+            self.future.set_result(result)
+
+
+class DownloadScheduler:
+    """A bounded pool of worker threads that runs jobs by priority, with a limit on the jobs per host."""
+
+    def __init__(self, max_workers: int = MAX_WORKERS, max_per_host: int = MAX_PER_HOST):
+        self.max_workers = max_workers
+        self.max_per_host = max_per_host
+        self.host_limits: dict[str, int] = {}
+
+        self._condition = Condition()
+        # priority -> group -> queued jobs
+        self._queues: dict[Priority, OrderedDict[str, deque[Job]]] = {p: OrderedDict() for p in Priority}
+        self._running_per_host: dict[str, int] = defaultdict(int)
+        self._workers: list[Thread] = []
+        self._idle_workers = 0
+        # The total number of jobs in the queues
+        self._queued = 0
+        self._shutdown = False
+        self._context = local()
+
+    def submit(
+        self,
+        function: Callable,
+        args: tuple = (),
+        kwargs: dict = None,
+        priority: Priority = None,
+        group: str = None,
+        url: str = "",
+    ) -> Future:
+        """Add a function to the queue, and return a future that will hold its result.
+        If the priority or group aren't given, the ones from the current job_context are used.
+        The url is used to limit the number of jobs connecting to the same host at once.
+        Don't wait on the result of a job from inside another job, as that can use up all of the workers."""
+        priority = Priority(priority if priority is not None else getattr(self._context, "priority", Priority.BULK))
+        group = group if group is not None else getattr(self._context, "group", "")
+        job = Job(function, args, kwargs or {}, host_from_url(url), group)
+
+        with self._condition:
+            if self._shutdown:
+                job.future.cancel()
+                return job.future
+            self._queues[priority].setdefault(group, deque()).append(job)
+            self._queued += 1
+            # Idle workers only stop counting as idle once they have been woken up and taken a job, so compare the
+            # number of queued jobs with the number of idle workers, rather than only starting one when none are idle.
+            if self._queued > self._idle_workers and len(self._workers) < self.max_workers:
+                worker = Thread(target=self._worker, name=f"ab_download_worker_{len(self._workers)}", daemon=True)
+                self._workers.append(worker)
+                worker.start()
+            self._condition.notify()
+        return job.future
+
+    def map(self, function: Callable, iterable, **submit_kwargs) -> list[Future]:
+        """Submit a job for each item in the iterable"""
+        return [self.submit(function, args=(item, ), **submit_kwargs) for item in iterable]
+
+    @contextmanager
+    def job_context(self, group: str = "", priority: Priority = Priority.INTERACTIVE):
+        """Set the default group and priority of the jobs submitted by the current thread.
+        This means that functions that submit their own jobs don't need to know which task they are part of."""
+        previous = getattr(self._context, "group", None), getattr(self._context, "priority", None)
+        self._context.group, self._context.priority = group, priority
+        try:
+            yield
+        finally:
+            self._context.group, self._context.priority = previous
+
+    def cancel(self, group: str) -> int:
+        """Cancel all of the queued jobs in the given group. Jobs that are already running are left to finish.
+        Returns the number of jobs that were cancelled."""
+        cancelled = 0
+        with self._condition:
+            for groups in self._queues.values():
+                for job in groups.pop(group, ()):
+                    cancelled += job.future.cancel()
+                    self._queued -= 1
+        return cancelled
+
+    def queued(self) -> int:
+        return self._queued
+
+    def start(self):
+        """Allow jobs to be submitted again after a shutdown, for when the addon is re-enabled"""
+        with self._condition:
+            self._shutdown = False
+
+    def shutdown(self):
+        """Cancel all queued jobs and stop the workers once their current jobs are done"""
+        with self._condition:
+            self._shutdown = True
+            for groups in self._queues.values():
+                for jobs in groups.values():
+                    for job in jobs:
+                        job.future.cancel()
+                groups.clear()
+            self._queued = 0
+            self._condition.notify_all()
+
+    def _host_available(self, host: str) -> bool:
+        return not host or self._running_per_host[host] < self.host_limits.get(host, self.max_per_host)
+
+    def _next_job(self) -> Job | None:
+        """Get the next job to run. Must be called while holding the condition lock."""
+        for groups in self._queues.values():
+            # Take a job from each group in turn, skipping any group whose next job is for a host that is busy.
+            for _ in range(len(groups)):
+                group, jobs = next(iter(groups.items()))
+                groups.move_to_end(group)
+                if not self._host_available(jobs[0].host):
+                    continue
+                job = jobs.popleft()
+                if not jobs:
+                    del groups[group]
+                self._queued -= 1
+                return job
+        return None
+
+    def _worker(self):
+        while True:
+            with self._condition:
+                while not (job := self._next_job()):
+                    if self._shutdown:
+                        # Remove this worker, so that new ones can be started if the scheduler is started again
+                        self._workers.remove(current_thread())
+                        return
+                    self._idle_workers += 1
+                    self._condition.wait()
+                    self._idle_workers -= 1
+                if job.host:
+                    self._running_per_host[job.host] += 1
+
+            job.run()
+
+            with self._condition:
+                if job.host:
+                    self._running_per_host[job.host] -= 1
+                # A slot for this host is now free, so wake any workers waiting for it.
+                self._condition.notify_all()
+
+
+def host_from_url(url: str) -> str:
+    return urlparse(url).netloc if url else ""
+
+
+scheduler = DownloadScheduler()
+
+
+def register():
+    # Blender keeps the module loaded when the addon is disabled, so the same scheduler is used when it is re-enabled
+    scheduler.start()
+
+
+def unregister():
+    scheduler.shutdown()
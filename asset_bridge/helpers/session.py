@@ -0,0 +1,99 @@
+from threading import Lock
+
+from urllib3.util.retry import Retry
+
+from ..vendor import requests
+from ..vendor.requests.adapters import HTTPAdapter
+"""A shared requests session that all of the network requests made by the addon should go through.
+
+Using a single session means that connections to each host are kept alive and reused between requests,
+rather than doing a new TCP connection and TLS handshake for every file, which is most of the time taken
+when downloading thousands of small preview images."""
+
+# The maximum number of threads that will make requests at the same time.
+# The connection pool for each host is sized to this, so that threads don't have to open throwaway connections.
+MAX_WORKERS = 16
+
+# The number of different hosts to keep a connection pool for.
+MAX_HOSTS = 10
+
+# Timeouts in seconds, used for requests that don't specify their own.
+CONNECT_TIMEOUT = 5
+READ_TIMEOUT = 30
+
+# Failed requests are retried with an exponential backoff of BACKOFF_FACTOR * 2 ^ (retry number - 1) seconds
+RETRIES = 3
+BACKOFF_FACTOR = 0.5
+RETRY_STATUS_CODES = (429, 500, 502, 503, 504)
+
+
+class Session(requests.Session):
+    """A requests session that applies a default timeout to all requests"""
+
+    def __init__(self, timeout: tuple[float, float]):
+        super().__init__()
+        self.timeout = timeout
+
+    def request(self, method, url, *args, **kwargs):
+        kwargs.setdefault("timeout", self.timeout)
+        return super().request(method, url, *args, **kwargs)
+
+
+_session: Session = None
+_session_lock = Lock()
+_config = {
+    "max_workers": MAX_WORKERS,
+    "connect_timeout": CONNECT_TIMEOUT,
+    "read_timeout": READ_TIMEOUT,
+    "retries": RETRIES,
+    "backoff_factor": BACKOFF_FACTOR,
+}
+
+
+def new_session(
+    max_workers: int = MAX_WORKERS,
+    connect_timeout: float = CONNECT_TIMEOUT,
+    read_timeout: float = READ_TIMEOUT,
+    retries: int = RETRIES,
+    backoff_factor: float = BACKOFF_FACTOR,
+) -> Session:
+    """Create a new session with pooled connections, and the given timeout and retry policy"""
+    retry = Retry(
+        total=retries,
+        # Don't keep retrying to connect when the user is offline, as that would block for a long time.
+        connect=1,
+        backoff_factor=backoff_factor,
+        status_forcelist=RETRY_STATUS_CODES,
+        allowed_methods={"HEAD", "GET", "OPTIONS"},
+        # Return the last response rather than raising, so that the status code can be handled by the caller
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=MAX_HOSTS, pool_maxsize=max_workers, max_retries=retry)
+    session = Session(timeout=(connect_timeout, read_timeout))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session() -> Session:
+    """Get the shared session, creating it if it doesn't exist yet"""
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = new_session(**_config)
+        return _session
+
+
+def configure_session(**kwargs):
+    """Change the settings used for the shared session (see new_session for the available arguments).
+    The current session is closed, and a new one is created with the new settings the next time it is needed."""
+    global _session
+    with _session_lock:
+        _config.update(kwargs)
+        if _session is not None:
+            _session.close()
+            _session = None
+
+
+def unregister():
+    configure_session()
@@ -0,0 +1,336 @@
+import os
+import json
+from time import monotonic
+from itertools import count
+from queue import Empty, Queue
+from threading import Event, Lock, Thread, current_thread
+
+from ..constants import FILES
+from .ipc import ERROR, JOB_DONE, LOG, PROGRESS, READY, ProcessChannel
+from .process import new_blender_process
+"""A pool of long running background blender processes that scripts can be run in.
+
+Starting blender and enabling the addon takes several seconds, which used to be paid for every asset list and every
+model that needed to be set up. The workers are kept running between jobs to avoid that, and are recycled after a
+number of jobs to stop memory from building up. Each job runs in a separate process from the main blender instance,
+so a crash only takes down that worker, and the job is reported as failed."""
+
+# The maximum number of workers that can run at once. Each one is a full blender instance, so this is kept fairly low.
+MAX_WORKERS = max(1, min(os.cpu_count() or 1, 8))
+# The number of jobs a worker runs before it is replaced with a fresh one
+JOBS_PER_WORKER = 20
+# Jobs are considered to have stalled if they haven't sent any messages or output for this many seconds.
+# Once a job has reported some progress, this is extended to STALL_FACTOR times the average time per item,
+# so that slow machines aren't killed for being slow, while jobs that hang are still caught quickly.
+STALL_TIMEOUT = 120
+STALL_FACTOR = 10
+# How long a worker can sit without any jobs before it is closed
+IDLE_TIMEOUT = 300
+STARTUP_TIMEOUT = 120
+
+job_ids = count()
+
+
+class WorkerJob:
+    """A script to be run by a worker process.
+    This has the same interface as ipc.ProcessChannel, so the two can be used interchangeably."""
+
+    def __init__(self, script, args: list[str], file=None, timeout: float = None, stall_timeout: float = STALL_TIMEOUT):
+        self.id = next(job_ids)
+        self.script = str(script)
+        self.args = [str(arg) for arg in args]
+        self.file = str(file) if file else ""
+        # An optional hard limit on the total time the job can take
+        self.timeout = timeout
+        self.stall_timeout = stall_timeout
+
+        self.progress = 0
+        self.errors: list[dict] = []
+        self.logs: list[str] = []
+        self.output: list[str] = []
+        self.successful: bool | None = None
+        self.cancelled = False
+        # Whether the job was stopped because it stalled or took too long
+        self.timed_out = False
+        self.started_at = 0
+        self.last_activity = 0
+        self.last_progress_at = 0
+        self._done = Event()
+
+    def to_json(self) -> str:
+        return json.dumps({"id": self.id, "script": self.script, "args": self.args, "file": self.file})
+
+    def start(self):
+        self.started_at = self.last_activity = monotonic()
+
+    def handle_message(self, message: dict):
+        message_type = message.get("type")
+        self.last_activity = monotonic()
+        if message_type == PROGRESS:
+            if message["value"] != self.progress:
+                self.last_progress_at = self.last_activity
+            self.progress = message["value"]
+        elif message_type == LOG:
+            self.logs.append(message["message"])
+        elif message_type == ERROR:
+            self.errors.append(message)
+
+    def finish(self, successful: bool, error: str = ""):
+        if self.finished:
+            return
+        if error:
+            self.errors.append({"message": error})
+        self.successful = successful
+        self._done.set()
+
+    def cancel(self):
+        """Stop the job. If it is running, the worker running it is killed."""
+        self.cancelled = True
+        if not self.started_at:
+            self.finish(False, "Job cancelled")
+
+    def handle_output(self, line: str):
+        self.last_activity = monotonic()
+        self.output.append(line)
+
+    @property
+    def stalled(self) -> bool:
+        """Whether the job has gone quiet for much longer than expected, based on its progress so far"""
+        if not self.started_at:
+            return False
+        allowed = self.stall_timeout
+        if self.progress > 0 and self.last_progress_at:
+            per_item = (self.last_progress_at - self.started_at) / self.progress
+            allowed = max(allowed, per_item * STALL_FACTOR)
+        return monotonic() - self.last_activity > allowed
+
+    @property
+    def finished(self) -> bool:
+        return self._done.is_set()
+
+    @property
+    def failed(self) -> bool:
+        return self.finished and (not self.successful or bool(self.errors))
+
+    @property
+    def error_message(self) -> str:
+        if self.errors:
+            return "\n".join(e.get("traceback") or e["message"] for e in self.errors)
+        if self.failed:
+            return "\n".join(self.output[-20:])
+        return ""
+
+    def wait(self, timeout: float = None) -> int:
+        """Wait for the job to finish, and return 0 if it was successful, or 1 if not"""
+        self._done.wait(timeout)
+        return 0 if self.successful else 1
+
+    def get_log(self) -> str:
+        lines = list(self.output)
+        lines += [f"LOG: {log}" for log in self.logs]
+        lines += [f"ERROR: {e.get('traceback') or e['message']}" for e in self.errors]
+        return "\n".join(lines)
+
+
+class BlenderWorker:
+    """A single background blender process that runs jobs one at a time"""
+
+    def __init__(self):
+        self.process = new_blender_process(FILES.script_worker, use_stdout=True, use_stdin=True)
+        self.jobs_run = 0
+        self.job: WorkerJob | None = None
+        self._ready = Event()
+        self._job_done = Event()
+        self._job_successful = False
+        self.channel = ProcessChannel(self.process, on_message=self._on_message, on_output=self._on_output)
+
+    @property
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def _on_message(self, message: dict):
+        message_type = message.get("type")
+        if message_type == READY:
+            self._ready.set()
+        elif message_type == JOB_DONE:
+            if self.job and message.get("job") == self.job.id:
+                self._job_successful = message.get("successful", False)
+                self._job_done.set()
+        elif self.job:
+            self.job.handle_message(message)
+
+    def _on_output(self, line: str):
+        if self.job:
+            self.job.handle_output(line)
+
+    def run(self, job: WorkerJob):
+        """Run a job and wait for it to finish, fail, time out or be cancelled"""
+        start = monotonic()
+        while not self._ready.wait(0.1):
+            if not self.alive or job.cancelled or monotonic() - start > STARTUP_TIMEOUT:
+                self.kill()
+                job.finish(False, "Worker process failed to start:\n" + "\n".join(self.channel.output[-20:]))
+                return
+
+        self.job = job
+        self._job_done.clear()
+        job.start()
+        if job.cancelled:
+            self.job = None
+            job.finish(False, "Job cancelled")
+            return
+        try:
+            self.process.stdin.write((job.to_json() + "\n").encode())
+            self.process.stdin.flush()
+        except OSError:
+            pass
+
+        while not self._job_done.wait(0.1):
+            if job.cancelled:
+                self.kill()
+                job.finish(False, "Job cancelled")
+                break
+            if not self.alive:
+                # Wait for any remaining output before reporting the crash
+                self.channel.wait(1)
+                job.finish(False, f"Worker process exited unexpectedly (code {self.process.returncode})")
+                break
+            if job.stalled or (job.timeout and monotonic() - job.started_at > job.timeout):
+                self.kill()
+                job.timed_out = True
+                seconds = monotonic() - job.last_activity
+                job.finish(False, f"Job timed out (no response for {seconds:.0f}s, progress: {job.progress})")
+                break
+        else:
+            job.finish(self._job_successful)
+
+        self.job = None
+        self.jobs_run += 1
+
+    def stop(self):
+        """Ask the worker to quit, and kill it if it doesn't"""
+        if not self.alive:
+            return
+        try:
+            self.process.stdin.write(b'{"quit": true}\n')
+            self.process.stdin.close()
+            self.process.wait(5)
+        except Exception:
+            self.kill()
+
+    def kill(self):
+        if self.alive:
+            self.process.kill()
+
+
+class BlenderWorkerPool:
+
+    def __init__(self, max_workers: int = MAX_WORKERS):
+        self.max_workers = max_workers
+        self._queue: Queue[WorkerJob | None] = Queue()
+        self._lock = Lock()
+        self._threads: list[Thread] = []
+        self._workers: set[BlenderWorker] = set()
+        self._idle = 0
+        self._shutdown = False
+
+    def submit(
+        self,
+        script,
+        args: list = (),
+        file=None,
+        timeout: float = None,
+        stall_timeout: float = STALL_TIMEOUT,
+    ) -> WorkerJob:
+        """Queue a script to be run by a worker, optionally with a blend file open.
+        The script receives the args after a "--" in sys.argv, in the same way as with new_blender_process.
+        The job is stopped if it stalls (see STALL_TIMEOUT), or if it takes longer than timeout, if given."""
+        job = WorkerJob(script, args, file, timeout, stall_timeout)
+        if self._shutdown:
+            job.finish(False, "Worker pool has been shut down")
+            return job
+
+        self._queue.put(job)
+        with self._lock:
+            # Idle threads only stop counting as idle once they have taken a job from the queue, so compare the number
+            # of waiting jobs with the number of idle threads, rather than only starting a thread when none are idle.
+            if self._queue.qsize() > self._idle and len(self._threads) < self.max_workers:
+                thread = Thread(target=self._run_worker, daemon=True)
+                self._threads.append(thread)
+                thread.start()
+        return job
+
+    def _run_worker(self):
+        """Take jobs from the queue and run them in a worker process, replacing it when needed."""
+        worker: BlenderWorker | None = None
+        while True:
+            with self._lock:
+                self._idle += 1
+            try:
+                job = self._queue.get(timeout=IDLE_TIMEOUT)
+            except Empty:
+                job = None
+            finally:
+                with self._lock:
+                    self._idle -= 1
+
+            if job is None or self._shutdown:
+                if job:
+                    job.finish(False, "Worker pool has been shut down")
+                break
+            if job.cancelled:
+                job.finish(False, "Job cancelled")
+                continue
+
+            # Start a new worker if there isn't one, or if it crashed or has run too many jobs
+            if worker is None or not worker.alive or worker.jobs_run >= JOBS_PER_WORKER:
+                if worker:
+                    worker.stop()
+                    self._workers.discard(worker)
+                worker = BlenderWorker()
+                self._workers.add(worker)
+
+            worker.run(job)
+
+        if worker:
+            worker.stop()
+            self._workers.discard(worker)
+        with self._lock:
+            self._threads.remove(current_thread())
+
+    def start(self):
+        """Allow jobs to be submitted again after a shutdown, for when the addon is re-enabled"""
+        with self._lock:
+            self._shutdown = False
+        # Clear out anything left from the shutdown, so that the stop signals don't close workers that are still running
+        while True:
+            try:
+                job = self._queue.get_nowait()
+            except Empty:
+                break
+            if job:
+                job.finish(False, "Worker pool has been shut down")
+
+    def shutdown(self):
+        """Cancel any queued jobs and close all of the workers"""
+        self._shutdown = True
+        with self._lock:
+            threads = len(self._threads)
+        for _ in range(threads):
+            self._queue.put(None)
+        for worker in list(self._workers):
+            if worker.job:
+                worker.job.cancel()
+            worker.kill()
+
+
+worker_pool = BlenderWorkerPool()
+
+
+def register():
+    # Blender keeps the module loaded when the addon is disabled, so the same pool is used when it is re-enabled
+    worker_pool.start()
+
+
+def unregister():
+    worker_pool.shutdown()
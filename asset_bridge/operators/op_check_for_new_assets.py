@@ -2,6 +2,7 @@ import bpy
 from bpy.props import BoolProperty
 
 from ..api import get_asset_lists
+from ..apis.asset_types import AssetListChanges
 from ..settings import get_ab_settings
 from ..constants import CHECK_NEW_ASSETS_TASK_NAME
 from ..helpers.btypes import BOperator
@@ -26,7 +27,7 @@ class AB_OT_check_for_new_assets(BOperator.type):
             return self.CANCELLED
 
         lists_obj = get_asset_lists()
-        threads = lists_obj.initialize_all(blocking=False)
+        threads = lists_obj.refresh_all(blocking=False)
         task = get_ab_settings(context).new_task(name=CHECK_NEW_ASSETS_TASK_NAME)
         task.new_progress(max_steps=len(threads))
 
@@ -52,6 +53,13 @@ class AB_OT_check_for_new_assets(BOperator.type):
                 return 0.1
 
             task.finish()
+
+            # The changes are also kept by the asset lists object, so that the library can be updated with them later.
+            changes = AssetListChanges()
+            for list_changes in lists_obj.last_refresh.values():
+                if list_changes:
+                    changes.merge(list_changes)
+
             new_assets = lists_obj.new_assets_available()
             if new_assets:
                 if self.report_message:
@@ -63,7 +71,11 @@ class AB_OT_check_for_new_assets(BOperator.type):
                         AB_OT_download_previews.run()
             else:
                 if self.report_message:
-                    report_message("INFO", "No new assets found, you're up to date!")
+                    if changes.changed or changes.removed:
+                        updated, removed = len(changes.changed), len(changes.removed)
+                        report_message("INFO", f"No new assets found, {updated} updated and {removed} removed.")
+                    else:
+                        report_message("INFO", "No new assets found, you're up to date!")
                 if self.auto_download:
                     AB_OT_create_dummy_assets.run()
 
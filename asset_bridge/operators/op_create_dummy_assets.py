@@ -1,29 +1,42 @@
-import subprocess
+import os
+import re
 from time import perf_counter
 from typing import Dict
 
 import bpy
+from bpy.props import BoolProperty
 
 from .op_report_message import report_exceptions
 
 from ..api import get_asset_lists
 from ..settings import get_ab_settings
+from ..helpers.prefs import get_prefs
 from ..constants import DIRS, PREVIEW_DOWNLOAD_TASK_NAME, Files
 from ..helpers.btypes import BOperator
 from ..helpers.catalog import AssetCatalogFile
-from ..helpers.library import ensure_bl_asset_library_exists
-from ..helpers.process import new_blender_process
+from ..helpers.library import (ensure_bl_asset_library_exists, get_shard_name, compute_shard_count, load_shard_counts,
+                               save_shard_counts)
+from ..helpers.worker_pool import WorkerJob, worker_pool
+from ..helpers.library_status import library_status
 from .op_report_message import report_message
 from ..helpers.main_thread import force_ui_update
 
 last_messages = {}
 process_progress = {}
 
+# How many times a shard that times out is run again before giving up
+MAX_RETRIES = 2
+
 
 @BOperator("asset_bridge")
 class AB_OT_create_dummy_assets(BOperator.type):
     """Create the dummy assets representing each online asset"""
 
+    full: BoolProperty(
+        description="Create all of the dummy assets from scratch, rather than only updating the ones that have changed",
+        options={"SKIP_SAVE"},
+    )
+
     def execute(self, context):
         asset_lists = get_asset_lists()
         ensure_bl_asset_library_exists()
@@ -42,26 +55,45 @@ class AB_OT_create_dummy_assets(BOperator.type):
         prefix = "(2/2)" if continuing else ""
         progress.message = f"{prefix} Setting up asset library:"
 
-        # Create a blender process for each asset list
-        processes: Dict[str, subprocess.Popen] = {}
-        for asset_list_name in asset_lists.keys():
-            print(asset_list_name)
-            process = new_blender_process(
+        stall_timeout = get_prefs(context).setup_timeout
+
+        def submit_shard(asset_list_name: str, shard: int, shards: int, incremental: bool) -> WorkerJob:
+            blend_file = DIRS.dummy_assets / f"{get_shard_name(asset_list_name, shard, shards)}.blend"
+            incremental = incremental and blend_file.exists()
+            script_args = ["--asset_list", asset_list_name, "--shard", shard, "--shards", shards]
+            if incremental:
+                script_args.append("--incremental")
+            return worker_pool.submit(
                 Files.script_create_dummy_assets,
-                script_args=["--asset_list", asset_list_name],
-                # use_stdout=False,
-                use_stdout=True,
+                args=script_args,
+                file=blend_file if incremental else None,
+                stall_timeout=stall_timeout,
             )
-            processes[asset_list_name] = process
 
-        start = perf_counter()
+        # Create a job for each asset list, which are run by the background blender worker processes.
+        # Large lists are split into shards that are set up in parallel, each saved to its own blend file.
+        jobs: Dict[str, WorkerJob] = {}
+        shard_info: Dict[str, tuple[str, int, int]] = {}
+        retries: Dict[str, int] = {}
+        # Keep the existing number of shards for each list, unless it is being rebuilt from scratch anyway
+        shard_counts = {} if self.full else load_shard_counts()
+        for asset_list_name, asset_list in asset_lists.items():
+            shards = shard_counts.get(asset_list_name) or compute_shard_count(len(asset_list.assets))
+            shard_counts[asset_list_name] = shards
+            shard_names = [get_shard_name(asset_list_name, shard, shards) for shard in range(shards)]
+            remove_old_shards(asset_list_name, shard_names)
+
+            for shard, shard_name in enumerate(shard_names):
+                # If the library has already been set up, only update the assets that have changed.
+                jobs[shard_name] = submit_shard(asset_list_name, shard, shards, incremental=not self.full)
+                shard_info[shard_name] = (asset_list_name, shard, shards)
+                retries[shard_name] = 0
+        save_shard_counts(shard_counts)
+
         update_interval = 0.01
 
-        def output_log(name, process):
-            try:
-                out = process.stdout.read().decode()
-            except AttributeError:
-                out = "stdin not used"
+        def output_log(name, job: WorkerJob):
+            out = job.get_log()
             print(out)
             with open(DIRS.dummy_assets / f"{name}_log.txt", "w") as f:
                 f.write(out)
@@ -73,32 +105,30 @@ class AB_OT_create_dummy_assets(BOperator.type):
 
             # If cancel button is pressed
             if progress.cancelled:
-                for name, process in processes.items():
-                    process.kill()
-                    output_log(name, process)
+                for name, job in jobs.items():
+                    job.cancel()
+                    job.wait()
+                    output_log(name, job)
                 report_message("INFO", "Setup cancelled.")
                 return
 
+            # The worker pool stops any jobs that stop making progress. The shards save their work as they go,
+            # so run them again from where they got to, rather than starting from scratch.
+            for name, job in list(jobs.items()):
+                if job.timed_out and retries[name] < MAX_RETRIES:
+                    retries[name] += 1
+                    output_log(name, job)
+                    print(f"Setup of {name} timed out at {job.progress} assets, retrying ({retries[name]})")
+                    jobs[name] = submit_shard(*shard_info[name], incremental=True)
+
             # Check if all processes are finished
-            completed = True
-            for process in processes.values():
-                if process.poll() is None:
-                    completed = False
-
-            # Handle a time out if the process continues for more than 100 seconds. I really hope no ones computer is
-            # Slow enough to run into this naturally, but oh well.
-            if perf_counter() - start > 100:
-                completed = True
-                for name, process in processes.items():
-                    process.kill()
-                    log = output_log(name, process)
-                report_message("ERROR", message=f"Process timed out, please try again.\nError log:\n{log}")
+            completed = all(job.finished for job in jobs.values())
 
             if completed:
                 # Combine the separate catalogs
                 catalog = AssetCatalogFile(DIRS.dummy_assets)
                 catalog.reset()
-                for name in processes:
+                for name in jobs:
                     file = DIRS.dummy_assets / f"{name}.cats.txt"
                     if not file.exists():
                         task.finish()
@@ -107,18 +137,12 @@ class AB_OT_create_dummy_assets(BOperator.type):
                     catalog.merge(other_catalog)
                 catalog.write()
 
-                # Reset the progress files
-                for name in processes:
-                    file = DIRS.dummy_assets / f"{name}_progress.txt"
-                    with open(file, "w") as f:
-                        f.write("0")
-
                 # Handle any errors
                 errors = False
-                for name, process in processes.items():
-                    out = output_log(name, process)
-                    if "Error" in out:
-                        report_message("ERROR", f"Error creating assets for {name}:\n{out}")
+                for name, job in jobs.items():
+                    output_log(name, job)
+                    if job.failed:
+                        report_message("ERROR", f"Error creating assets for {name}:\n{job.error_message}")
                         errors = True
 
                 if not errors:
@@ -129,22 +153,26 @@ class AB_OT_create_dummy_assets(BOperator.type):
                     )
 
                 task.finish()
+                library_status.invalidate()
                 force_ui_update(area_types={"PREFERENCES"})
                 return
 
             # Update progress
-            total = 0
-            for name in processes:
-                file = DIRS.dummy_assets / f"{name}_progress.txt"
-                if not file.exists():
-                    continue
-                with open(file, "r") as f:
-                    try:
-                        total += int(f.read())
-                    except ValueError:
-                        return update_interval
-            progress.progress = total
+            total = sum(job.progress for job in jobs.values())
+            if total != progress.progress:
+                progress.progress = total
 
             return update_interval
 
         bpy.app.timers.register(check_processes)
+
+
+def remove_old_shards(asset_list_name: str, shard_names: list[str]):
+    """Remove the files for any shards of an asset list that were created with a different number of shards,
+    as the assets in them will now be in the new shards instead."""
+    pattern = re.compile(f"{re.escape(asset_list_name)}(_\\d+-\\d+)?")
+    for file in DIRS.dummy_assets.iterdir():
+        stem = file.name.split(".")[0]
+        if file.name.endswith((".blend", ".blend1", ".cats.txt")) and pattern.fullmatch(stem):
+            if stem not in shard_names:
+                os.remove(file)
@@ -1,25 +1,33 @@
-import os
 import random
 from time import perf_counter
 from random import choice
 from itertools import islice
 from threading import Thread
-from collections import deque
+from concurrent.futures import wait
 
 import bpy
 from bpy.props import IntProperty, BoolProperty
 
 from ..api import get_asset_lists
 from ..settings import get_ab_settings
-from ..constants import DIRS, PREVIEW_DOWNLOAD_TASK_NAME
+from ..constants import PREVIEW_DOWNLOAD_TASK_NAME
 from ..helpers.btypes import BOperator
 from ..helpers.general import check_internet
+from ..helpers.library_status import library_status
+from ..helpers.preview_manifest import preview_manifest
+from ..helpers.connectivity import connectivity
+from ..helpers.session import MAX_WORKERS
+from ..helpers.scheduler import Priority, host_from_url, scheduler
 from ..apis.asset_types import AssetListItem
 from .op_report_message import report_exceptions, report_message
 from ..helpers.main_thread import run_in_main_thread
 from .op_create_dummy_assets import AB_OT_create_dummy_assets
 from ..vendor.requests.exceptions import ConnectTimeout
 
+# The number of previews that can be downloaded from the same host at once. The previews are tiny, so most of the
+# time is spent waiting on round trips, and more requests in parallel help much more than for other downloads.
+PREVIEW_HOST_LIMIT = MAX_WORKERS
+
 
 @BOperator("asset_bridge")
 class AB_OT_download_previews(BOperator.type):
@@ -35,7 +43,13 @@ class AB_OT_download_previews(BOperator.type):
 
     def execute(self, context):
         if not check_internet():
-            report_message("ERROR", "Cannot download the asset previews as there is no internet connection")
+            # This isn't urgent, so rather than failing, wait for the connection to come back and try again.
+            kwargs = {"reload": self.reload, "test_number": self.test_number}
+            connectivity.when_online(self.__class__.run, kwargs=kwargs)
+            report_message(
+                "WARNING",
+                "No internet connection, the asset previews will be downloaded once the connection is back",
+            )
             return self.CANCELLED
 
         ab = get_ab_settings(context)
@@ -43,8 +57,7 @@ class AB_OT_download_previews(BOperator.type):
         assets = get_asset_lists().all_assets
 
         if not self.reload:
-            previews = {p.replace(".png", "") for p in os.listdir(DIRS.previews)}
-            assets = {k: v for k, v in assets.items() if k not in previews}
+            assets = {k: v for k, v in assets.items() if preview_manifest.needs_download(v)}
 
         if self.test_number != -1:
             # Pick 10 items from the list, rather than downloading all of them
@@ -58,12 +71,13 @@ class AB_OT_download_previews(BOperator.type):
         progress = task.new_progress(len(assets))
 
         def download_all_previews():
-            """Download each preview on a separate thread to improve the speed.
-            Ideally I could use multiprocessing here as well as Threading, but that doesn't seem to play nicely
-            with Blender, and while I'm sure it *could* work, I can't be bothered figuring it out."""
+            """Download the previews in parallel through the download scheduler, which uses the shared session's
+            pooled connections. They are queued with the lowest priority, so that importing an asset while they are
+            downloading doesn't have to wait for all of them to finish."""
             names = set(assets.keys())
             finished = False
 
+            @report_exceptions(main_thread=True)
             def download_preview(asset: AssetListItem):
                 """Download a single preview and increment the progress"""
                 if progress.cancelled:
@@ -76,8 +90,15 @@ class AB_OT_download_previews(BOperator.type):
                         message=f"Could not download the preview for {asset.ab_idname}:\n{e}",
                         main_thread=True,
                     )
+                else:
+                    if not preview_manifest.record(asset.ab_idname, asset.preview_file, asset.get_preview_url()):
+                        report_message(
+                            severity="ERROR",
+                            message=f"The preview downloaded for {asset.ab_idname} is not a valid image",
+                            main_thread=True,
+                        )
                 progress.increment()
-                names.remove(asset.ab_idname)
+                names.discard(asset.ab_idname)
 
             def update_message():
                 """Update the message with a random preview name.
@@ -94,30 +115,24 @@ class AB_OT_download_previews(BOperator.type):
 
             start = perf_counter()
 
-            # Start 40 threads, each downloading previews from a queue.
-            # Not sure if this is an optimal number for all machines, or just mine.
-            # TODO: Test on the laptop.
-            target_threads = 10
-
-            download_queue = deque(assets.values())
-
-            @report_exceptions(main_thread=True)
-            def download_previews():
-                """Continuously download previews until the queue is empty"""
-                while download_queue:
-                    asset = download_queue.pop()
-                    download_preview(asset)
-
-            threads: list[Thread] = []
-
-            # Start the target number of threads
-            for _ in range(target_threads):
-                thread = Thread(target=download_previews)
-                thread.start()
-                threads.append(thread)
-
-            for thread in threads:
-                thread.join()
+            urls = {asset.ab_idname: asset.get_preview_url() for asset in assets.values()}
+            for host in {host_from_url(url) for url in urls.values()}:
+                scheduler.host_limits[host] = PREVIEW_HOST_LIMIT
+
+            # Queue all of the previews. The number that run at once is limited by the scheduler.
+            # Cancelling the task removes any that haven't started yet from the queue.
+            jobs = [
+                scheduler.submit(
+                    download_preview,
+                    args=(asset, ),
+                    priority=Priority.BULK,
+                    group=task.name,
+                    url=urls[asset.ab_idname],
+                ) for asset in assets.values()
+            ]
+            wait(jobs)
+            preview_manifest.save()
+            library_status.invalidate()
 
             finished = True
             if progress.cancelled:
@@ -126,9 +141,10 @@ class AB_OT_download_previews(BOperator.type):
                 return
 
             task.finish()
+            total = perf_counter() - start
             report_message(
                 "INFO",
-                message=f"Downloaded {len(assets)} asset previews in {perf_counter() - start:.2f}s",
+                message=f"Downloaded {len(assets)} asset previews in {total:.2f}s ({len(assets) / total:.1f}/s)",
                 main_thread=True,
             )
 
@@ -137,3 +153,4 @@ class AB_OT_download_previews(BOperator.type):
         # Download the previews on a separate thread to avoid freezing the UI
         thread = Thread(target=download_all_previews)
         thread.start()
+
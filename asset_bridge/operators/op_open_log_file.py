@@ -5,6 +5,7 @@ import webbrowser
 from ..api import get_asset_lists
 
 from ..helpers.library import human_readable_file_size
+from ..helpers.main_thread import dispatcher
 from ..constants import DIRS, FILES
 from bpy.types import Context
 from ..helpers.btypes import BOperator
@@ -37,6 +38,11 @@ class AB_OT_open_log_file(BOperator.type):
         output += f"No. of assets: {len(all_asset_lists.all_assets)}\n"
         output += f"No. of previews: {len(list(DIRS.previews.glob('*.png')))}\n\n"
 
+        output += "Main thread queue:\n"
+        for name, value in dispatcher.get_stats().items():
+            output += f"{indent}{name}: {value:.4g}\n"
+        output += "\n"
+
         if FILES.lib_info.exists():
             try:
                 output += f"library version: {json.loads(FILES.lib_info.read_text())['version']}\n"
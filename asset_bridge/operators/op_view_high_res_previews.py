@@ -1,3 +1,5 @@
+from pathlib import Path
+
 import bpy
 import gpu
 from gpu.types import GPUBatch
@@ -8,6 +10,7 @@ from ..settings import get_ab_settings
 from ..constants import DIRS
 from ..helpers.math import vec_divide
 from ..helpers.btypes import BOperator
+from ..helpers.scheduler import Priority, scheduler
 from ..helpers.drawing import Shaders, get_active_window_region
 from ..apis.asset_utils import download_file, file_name_from_url
 
@@ -33,7 +36,10 @@ class AB_OT_view_high_res_previews(BOperator.type):
             if file.exists():
                 files.append(file)
                 continue
-            files.append(download_file(url, DIRS.high_res_previews, file_name=fname))
+            # Download the images in parallel, ahead of any bulk downloads that are running
+            args = (url, DIRS.high_res_previews, fname)
+            files.append(scheduler.submit(download_file, args=args, priority=Priority.PREVIEW, url=url))
+        files = [f if isinstance(f, Path) else f.result() for f in files]
 
         self.multiple_images = len(files) > 1
 
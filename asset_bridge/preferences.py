@@ -1,10 +1,9 @@
-import os
 import json
 from pathlib import Path
 from .operators.op_open_log_file import AB_OT_open_log_file
 
 import bpy
-from bpy.props import BoolProperty, EnumProperty, FloatProperty, StringProperty
+from bpy.props import BoolProperty, EnumProperty, FloatProperty, IntProperty, StringProperty
 from bpy.types import Menu, UILayout, AddonPreferences
 
 from .api import get_asset_lists
@@ -19,6 +18,8 @@ from .constants import (
     PREVIEW_DOWNLOAD_TASK_NAME,
 )
 from .helpers.prefs import get_prefs
+from .helpers.library_status import library_status
+from .helpers.worker_pool import STALL_TIMEOUT
 from .ui.ui_helpers import wrap_text, draw_inline_prop, draw_inline_column, draw_prefs_section, draw_download_previews
 from .helpers.btypes import BMenu
 from .helpers.library import is_lib_path_invalid, ensure_bl_asset_library_exists
@@ -95,6 +96,7 @@ class ABAddonPreferences(UpdaterPreferences, AddonPreferences):
         # write to the config file
         with open(FILES.lib_info, "w") as f:
             json.dump(default_info_contents, f, indent=2)
+        library_status.invalidate()
 
     lib_path: StringProperty(
         name="External Downloads path",
@@ -178,6 +180,21 @@ class ABAddonPreferences(UpdaterPreferences, AddonPreferences):
         subtype="FACTOR",
     )
 
+    setup_timeout: IntProperty(
+        name="Setup timeout",
+        description=" ".join(
+            (
+                "How many seconds a background process setting up the asset library can go without making any progress",
+                "before it is assumed to have frozen and is restarted.",
+                "Processes that are making progress slowly are given longer than this automatically",
+            )
+        ),
+        default=STALL_TIMEOUT,
+        min=5,
+        soft_max=600,
+        subtype="TIME_ABSOLUTE",
+    )
+
     # IMPORT SETTINGS PANEL
     show_import_settings: new_show_prop("import", False)
     draw_import_settings_at_top: BoolProperty(
@@ -220,12 +237,13 @@ class ABAddonPreferences(UpdaterPreferences, AddonPreferences):
             return
 
         ab = get_ab_settings(context)
-        lists_obj = get_asset_lists()
+        # This is computed in the background, so that drawing doesn't need to check every asset
+        status = library_status.get()
 
         # Draw the download previews button/progress bar
-        new_assets_available = lists_obj.new_assets_available()
+        new_assets_available = status.new_assets_available
         # Check if there are new assets/whether they are already downloading
-        if PREVIEW_DOWNLOAD_TASK_NAME in ab.tasks.keys() or new_assets_available or not lists_obj.all_initialized:
+        if PREVIEW_DOWNLOAD_TASK_NAME in ab.tasks.keys() or new_assets_available or not status.all_initialized:
             task = ab.tasks.get(PREVIEW_DOWNLOAD_TASK_NAME)
             if task and not task.progress:
                 box = layout.box().column(align=True)
@@ -237,17 +255,12 @@ class ABAddonPreferences(UpdaterPreferences, AddonPreferences):
                 op.name = PREVIEW_DOWNLOAD_TASK_NAME
                 return
 
-            all_assets = lists_obj.all_assets
-            preview_files = os.listdir(DIRS.previews)
-            first_time = len(preview_files) == 0
+            first_time = status.preview_count == 0
             task_steps = task.progress.max if task else 0
 
             # Draw info showing the number of previews to download, only if it is not the first time download
-            if new_assets_available and task_steps != len(all_assets) and not first_time:
-                needed_previews = set(a.ab_idname for a in all_assets.values()) - {
-                    p.replace(".png", "") for p in preview_files
-                }
-                layout.label(text=self.format_download_label(needed_previews))
+            if new_assets_available and task_steps != status.total_assets and not first_time:
+                layout.label(text=self.format_download_label(status.missing_previews))
 
             # Draw the button/progress bar
             draw_download_previews(layout, reload=first_time)
@@ -257,12 +270,10 @@ class ABAddonPreferences(UpdaterPreferences, AddonPreferences):
         row.scale_y = 1.5
         asset_lists = get_asset_lists()
 
-        dummy_blends = [f for f in DIRS.dummy_assets.iterdir() if f.suffix == ".blend"]
-
         if (task := ab.tasks.get(CHECK_NEW_ASSETS_TASK_NAME)) and task.progress:
             task.draw_progress(row)
 
-        elif len(dummy_blends) < len(asset_lists):
+        elif not status.dummy_assets_set_up:
             InfoSnippets.set_up_dummy_assets.draw(row)
             row.scale_x = 1.5
             op = AB_OT_check_for_new_assets.draw_button(
@@ -291,6 +302,7 @@ class ABAddonPreferences(UpdaterPreferences, AddonPreferences):
         draw_inline_prop(section, self, "auto_pack_files", "Auto pack files", "", factor=fac)
         draw_inline_prop(section, self, "viewport_panel_category", "N-Panel category", "", factor=fac)
         draw_inline_prop(section, self, "browser_panel_location", "Browser panel side", "", factor=fac)
+        draw_inline_prop(section, self, "setup_timeout", "Setup timeout", "", factor=fac)
         col = section.column(align=True)
         draw_inline_prop(col, self, "widget_scale", "Widget scale", "", factor=fac)
         draw_inline_prop(col, self, "widget_anim_speed", "Animation speed", "", factor=fac)
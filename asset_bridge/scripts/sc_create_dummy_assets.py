@@ -1,4 +1,5 @@
 import argparse
+import hashlib
 import json
 import os
 import sys
@@ -8,29 +9,47 @@ from typing import TYPE_CHECKING, Dict
 
 import addon_utils
 import bpy
-from bpy.types import Material, Object, World
+import numpy as np
+from bpy.types import ID, Material, Object, World
 
-addon_utils.enable(Path(__file__).parents[1].name)
+# When run by a worker process (sc_worker.py), the addon is already enabled, and blender shouldn't be closed.
+if __name__ == "__main__":
+    addon_utils.enable(Path(__file__).parents[1].name)
 
 if TYPE_CHECKING:
     from ..api import get_asset_lists
     from ..apis.asset_utils import HDRI, MATERIAL, MODEL
     from ..constants import DIRS, FILES
+    from ..helpers import ipc
     from ..helpers.catalog import AssetCatalogFile
+    from ..helpers.library import get_asset_shard, get_shard_name
     from ..settings import get_asset_settings
 else:
     from asset_bridge.api import get_asset_lists
     from asset_bridge.apis.asset_utils import HDRI, MATERIAL, MODEL
     from asset_bridge.constants import DIRS, FILES
+    from asset_bridge.helpers import ipc
     from asset_bridge.helpers.catalog import AssetCatalogFile
+    from asset_bridge.helpers.library import get_asset_shard, get_shard_name
     from asset_bridge.settings import get_asset_settings
 """Creates all of the dummy assets for the given asset list that will be shown in the asset browser.
-These are empty materials, objects etc. which are swapped out automatically when they are dragged into the scene"""
+These are empty materials, objects etc. which are swapped out automatically when they are dragged into the scene.
 
-# TODO: Only set up the assets that need to be, to speed up getting new assets
+Large asset lists are split into shards which are each set up by a separate process, and saved to separate files.
+Each asset always belongs to the same shard, so the shard only contains the assets for which get_asset_shard matches.
+
+With --incremental, this should be run with the existing dummy asset blend file open, and only the assets that have
+been added, removed or changed since it was last saved are updated, which is much faster for small changes.
+The file is also saved every CHECKPOINT_INTERVAL seconds while the assets are being created, so that if the process
+times out or crashes, it can be run again with --incremental and only the remaining assets need to be set up."""
 
 parser = argparse.ArgumentParser()
 parser.add_argument("--asset_list_name")
+parser.add_argument("--incremental", action="store_true")
+parser.add_argument("--shard", type=int, default=0)
+parser.add_argument("--shards", type=int, default=1)
+# Compare the speed of the different ways of loading previews on the given number of assets, and then exit
+parser.add_argument("--benchmark_previews", type=int, default=0)
 args = sys.argv[sys.argv.index("--") + 1 :]
 args = parser.parse_args(args)
 
@@ -38,22 +57,19 @@ asset_list = get_asset_lists()[args.asset_list_name]
 with open(FILES.prefs, "r") as f:
     lib_path = json.load(f)["lib_path"]
 DIRS.update(lib_path)
-progress_file = DIRS.dummy_assets / f"{asset_list.name}_progress.txt"
-
-
-def update_progress_file(value):
-    # Write the new progress value
-    with open(progress_file, "w") as f:
-        f.write(str(value))
-
+shard_name = get_shard_name(asset_list.name, args.shard, args.shards)
+shard_items = [i for i in asset_list.values() if get_asset_shard(i.ab_idname, args.shards) == args.shard]
 
-update_progress_file(0)
+# Send the progress and any errors back to the main blender process
+if __name__ == "__main__":
+    ipc.report_uncaught_exceptions()
+ipc.send_progress(0)
 
-# setup catalog file
-catalog = AssetCatalogFile(DIRS.dummy_assets, f"{asset_list.name}.cats.txt", load_from_file=False)
+# setup catalog file. The catalog uuids are generated from their paths, so they are the same for every shard.
+catalog = AssetCatalogFile(DIRS.dummy_assets, f"{shard_name}.cats.txt", load_from_file=False)
 # catalog.add_catalog(asset_list.label)
 
-paths: set[str] = set()
+catalog_paths: dict[str, str] = {}  # The catalog path of each asset, by idname
 
 # A dict the popularities of each asset category, separated by type
 all_categories: Dict[str, Dict[str, int]] = {}
@@ -89,8 +105,10 @@ for asset_item in asset_list.values():
     # path = f"{asset_list.label}/{ui_names[asset_item.ab_type]}/{'/'.join(cats)}"
     path = f"{ui_names[asset_item.ab_type]}/{'/'.join(cats)}"
     # path = path.replace(":", ";")
-    asset_item._catalog_path = path
-    paths.add(path)
+    catalog_paths[asset_item.ab_idname] = path
+
+# The catalog paths are found using the whole list, but only the ones used in this shard are needed.
+paths = {catalog_paths[asset_item.ab_idname] for asset_item in shard_items}
 
 # Add the intermediate paths (so that the names don't have the asterisk next to them in the asset browser)
 intermediate_paths = set()
@@ -113,58 +131,180 @@ progress = 0
 progress_update_interval = 0.01
 last_update = 0
 
-# Initial: 1.4s, 2.39s
+# How often to save the work done so far, in seconds
+CHECKPOINT_INTERVAL = 20
+blend_file = DIRS.dummy_assets / (shard_name + ".blend")
+
+
+def save():
+    ipc.send_heartbeat()
+    bpy.ops.wm.save_mainfile(filepath=str(blend_file), check_existing=False)
+    ipc.send_heartbeat()
+
 
-start = perf_counter()
+def get_asset_hash(asset_item) -> str:
+    """Get a hash of all of the info that is used to set up a dummy asset, so that changes can be detected"""
+    info = [asset_item.ab_label, asset_item.ab_bl_type.__name__, asset_item.ab_authors[0], asset_item.ab_tags]
+    return hashlib.md5(json.dumps(info).encode()).hexdigest()
 
-# Create a data block for each asset, and set it's properties
-for i, asset_item in enumerate(asset_list.values()):
-    params = {}
-    if asset_item.ab_bl_type == Object:
-        params["object_data"] = None
-    asset = types_to_data[asset_item.ab_bl_type].new(asset_item.ab_label, **params)
 
-    # Set asset bridge attributes
+def get_preview_time(asset_item) -> str:
+    # This is stored as a string, as float properties aren't precise enough to hold a timestamp
+    preview_file = DIRS.previews / f"{asset_item.ab_idname}.png"
+    return str(preview_file.stat().st_mtime) if preview_file.exists() else ""
+
+
+# The size of the previews shown in the asset browser. Larger images are scaled down to this.
+PREVIEW_SIZE = 256
+
+
+def load_preview_operator(asset: ID, preview_file: Path):
+    """Load a preview with the built in operator. This is slow, as it needs a context override and operator call."""
+    with bpy.context.temp_override(id=asset):
+        bpy.ops.ed.lib_id_load_custom_preview(filepath=str(preview_file))
+
+
+def load_preview(asset: ID, preview_file: Path):
+    """Load an image file and write its pixels directly into the preview of the given ID,
+    which avoids the overhead of calling the operator for every asset."""
+    if not preview_file.exists():
+        return
+    try:
+        image = bpy.data.images.load(str(preview_file), check_existing=False)
+    except RuntimeError as e:
+        ipc.send_log(f"Could not load preview {preview_file.name}: {e}")
+        return
+
+    width, height = image.size
+    if max(width, height) > PREVIEW_SIZE:
+        factor = PREVIEW_SIZE / max(width, height)
+        width, height = max(int(width * factor), 1), max(int(height * factor), 1)
+        image.scale(width, height)
+
+    pixels = np.empty(width * height * 4, dtype=np.float32)
+    image.pixels.foreach_get(pixels)
+    bpy.data.images.remove(image)
+
+    preview = asset.preview_ensure()
+    preview.image_size = (width, height)
+    preview.image_pixels_float.foreach_set(pixels)
+
+
+def benchmark_previews(items: list, count: int):
+    """Print the average time taken to load a preview with each method"""
+    items = [i for i in items if (DIRS.previews / f"{i.ab_idname}.png").exists()][:count]
+    for method in (load_preview_operator, load_preview):
+        assets = [bpy.data.materials.new(f"benchmark_{i}") for i in range(len(items))]
+        start = perf_counter()
+        for asset, asset_item in zip(assets, items):
+            method(asset, DIRS.previews / f"{asset_item.ab_idname}.png")
+        total = perf_counter() - start
+        print(f"{method.__name__}: {total / max(len(items), 1) * 1000:.3f}ms per asset ({len(items)} assets)")
+        for asset in assets:
+            bpy.data.materials.remove(asset)
+
+
+if args.benchmark_previews:
+    benchmark_previews(shard_items, args.benchmark_previews)
+    sys.exit(0)
+
+# Find the dummy assets that already exist in the file
+existing: dict[str, ID] = {}
+if args.incremental:
+    for data_collection in types_to_data.values():
+        for data_block in data_collection:
+            data = get_asset_settings(data_block)
+            if data.is_dummy and data.idname:
+                existing[data.idname] = data_block
+
+counts = {"added": 0, "removed": 0, "updated": 0}
+start = last_checkpoint = perf_counter()
+preview_time_total = 0
+previews_loaded = 0
+
+# Remove the assets that are no longer in the asset list, or that have changed type
+items_by_idname = {asset_item.ab_idname: asset_item for asset_item in shard_items}
+for idname, data_block in list(existing.items()):
+    asset_item = items_by_idname.get(idname)
+    if not asset_item or not isinstance(data_block, asset_item.ab_bl_type):
+        types_to_data[type(data_block)].remove(data_block)
+        del existing[idname]
+        counts["removed"] += 1
+
+# Create or update a data block for each asset, and set it's properties
+for i, asset_item in enumerate(shard_items):
+    asset = existing.get(asset_item.ab_idname)
+    if not asset:
+        params = {}
+        if asset_item.ab_bl_type == Object:
+            params["object_data"] = None
+        asset = types_to_data[asset_item.ab_bl_type].new(asset_item.ab_label, **params)
+
+        # Set asset bridge attributes
+        data = get_asset_settings(asset)
+        data.is_dummy = True
+        data.idname = asset_item.ab_idname
+        asset.asset_mark()
+        counts["added"] += 1
+
     data = get_asset_settings(asset)
-    data.is_dummy = True
-    data.idname = asset_item.ab_idname
 
     # Set blender asset attributes
-    asset.asset_mark()
-    asset.asset_data.author = asset_item.ab_authors[0]
-    asset.asset_data.description = asset_item.ab_idname
-    for tag in asset_item.ab_tags:
-        asset.asset_data.tags.new(tag)
-
-    tags = set(asset_item.ab_tags)
-    if asset_item.ab_type not in tags:
-        asset.asset_data.tags.new(asset_item.ab_type)
-    asset.asset_data.tags.new(data.idname)
-    asset.asset_data.tags.new(asset_list.label)
-
-    # Load previews (This is the slowest part, not sure how to speed it up)
-    with bpy.context.temp_override(id=asset):
-        bpy.ops.ed.lib_id_load_custom_preview(filepath=str(DIRS.previews / f"{asset_item.ab_idname}.png"))
+    asset_hash = get_asset_hash(asset_item)
+    if data.dummy_hash != asset_hash:
+        if data.dummy_hash:
+            counts["updated"] += 1
+        asset.name = asset_item.ab_label
+        asset.asset_data.author = asset_item.ab_authors[0]
+        asset.asset_data.description = asset_item.ab_idname
+        for tag in list(asset.asset_data.tags):
+            asset.asset_data.tags.remove(tag)
+        for tag in asset_item.ab_tags:
+            asset.asset_data.tags.new(tag)
+
+        tags = set(asset_item.ab_tags)
+        if asset_item.ab_type not in tags:
+            asset.asset_data.tags.new(asset_item.ab_type)
+        asset.asset_data.tags.new(data.idname)
+        asset.asset_data.tags.new(asset_list.label)
+        data.dummy_hash = asset_hash
+
+    # Load previews (This is the slowest part, so only do it if the preview file has changed)
+    preview_time = get_preview_time(asset_item)
+    if data.dummy_preview_time != preview_time:
+        preview_start = perf_counter()
+        load_preview(asset, DIRS.previews / f"{asset_item.ab_idname}.png")
+        preview_time_total += perf_counter() - preview_start
+        previews_loaded += 1
+        data.dummy_preview_time = preview_time
 
     # Set the catalog
-    # asset.asset_data.catalog_id = catalog[asset_list.label + "/" + asset_item.catalog_path].uuid
-    asset.asset_data.catalog_id = catalog[asset_item._catalog_path].uuid
+    catalog_id = catalog[catalog_paths[asset_item.ab_idname]].uuid
+    if asset.asset_data.catalog_id != catalog_id:
+        asset.asset_data.catalog_id = catalog_id
 
     # Update the progress
     progress += 1
     if perf_counter() - last_update > progress_update_interval:
-        update_progress_file(progress)
+        ipc.send_progress(progress)
         last_update = perf_counter()
 
-print(f"created assets in {perf_counter() - start:.3f}s")
+    if perf_counter() - last_checkpoint > CHECKPOINT_INTERVAL:
+        save()
+        last_checkpoint = perf_counter()
+
+ipc.send_progress(progress)
+ipc.send_log(f"created assets in {perf_counter() - start:.3f}s ({', '.join(f'{v} {k}' for k, v in counts.items())})")
+if previews_loaded:
+    per_asset = preview_time_total / previews_loaded * 1000
+    ipc.send_log(f"loaded {previews_loaded} previews in {preview_time_total:.3f}s ({per_asset:.3f}ms per asset)")
 
-# Save
-blend_file = DIRS.dummy_assets / (asset_list.name + ".blend")
-bpy.ops.wm.save_mainfile(filepath=str(blend_file), check_existing=False)
+save()
 
 # Remove blend1 file
-blend1_file = DIRS.dummy_assets / (asset_list.name + ".blend1")
+blend1_file = DIRS.dummy_assets / (shard_name + ".blend1")
 if blend1_file.exists():
     os.remove(blend1_file)
 
-bpy.ops.wm.quit_blender()
+if __name__ == "__main__":
+    bpy.ops.wm.quit_blender()
@@ -0,0 +1,84 @@
+import json
+import runpy
+import sys
+import traceback
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+import addon_utils
+import bpy
+
+addon_utils.enable(Path(__file__).parents[1].name)
+
+if TYPE_CHECKING:
+    from ..api import get_asset_lists
+    from ..helpers import ipc
+else:
+    from asset_bridge.api import get_asset_lists
+    from asset_bridge.helpers import ipc
+"""A long running background blender process that runs scripts sent to it by the main blender process.
+This avoids paying the cost of starting blender and enabling the addon for every script that needs to be run.
+
+Jobs are received as lines of json on stdin, and the results are sent back with the messages in helpers/ipc.py.
+The scripts are run with runpy, with a __name__ other than "__main__", so they shouldn't quit blender when finished."""
+
+# The modification times of the asset list caches that are currently loaded
+cache_times: dict[str, float] = {}
+
+
+def reload_asset_lists():
+    """The asset lists can be updated by the main process while this worker is running,
+    so reload any that have changed on disk since they were last loaded."""
+    asset_lists = get_asset_lists()
+    asset_lists.load_pending()
+    for name, asset_list in asset_lists.asset_lists.items():
+        cache = asset_list.data_cache
+        if not cache.file.exists():
+            continue
+        mtime = cache.file.stat().st_mtime
+        if cache_times.get(name) == mtime:
+            continue
+        # The first time, the data will usually have already been loaded when the addon was registered
+        if name in cache_times or not asset_lists.is_initialized(name):
+            asset_lists.initialize_asset_list(name, data=cache.read(), validators=cache.validators)
+        cache_times[name] = mtime
+
+
+def run_job(job: dict) -> bool:
+    """Run a single job, and return whether it was successful"""
+    # Start from a clean file each time, so that jobs can't affect each other.
+    if job.get("file"):
+        bpy.ops.wm.open_mainfile(filepath=job["file"])
+    else:
+        bpy.ops.wm.read_homefile(use_factory_startup=True)
+    # Opening large files can take a while, so let the main process know that this hasn't frozen
+    ipc.send_heartbeat()
+
+    reload_asset_lists()
+    sys.argv = [bpy.app.binary_path, "--", *job.get("args", [])]
+    try:
+        runpy.run_path(job["script"], run_name="__worker__")
+    except SystemExit as e:
+        return e.code in {None, 0}
+    except Exception as e:
+        ipc.send_error(f"{type(e).__name__}: {e}", traceback.format_exc())
+        return False
+    return True
+
+
+ipc.send(ipc.READY)
+
+for line in sys.stdin:
+    if not line.strip():
+        continue
+    job = json.loads(line)
+    if job.get("quit"):
+        break
+    try:
+        successful = run_job(job)
+    except Exception as e:
+        ipc.send_error(f"{type(e).__name__}: {e}", traceback.format_exc())
+        successful = False
+    ipc.send(ipc.JOB_DONE, job=job["id"], successful=successful)
+
+bpy.ops.wm.quit_blender()
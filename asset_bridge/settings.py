@@ -9,6 +9,7 @@ from bpy.types import ID, Collection, Context, Material, UILayout, PropertyGroup
 
 from .api import get_asset_lists
 from .helpers.progress import Progress
+from .helpers.scheduler import scheduler
 
 
 def add_progress(cls, name):
@@ -35,6 +36,11 @@ def _make_item(id, name, descr, icon="", number=0):
     return _item_map[lookup]
 
 
+# The quality level items of each asset, along with the quality levels and download states they were created from,
+# so that the enum items only need to be rebuilt when one of those changes.
+_quality_items: dict[str, tuple[tuple, list]] = dict()
+
+
 class AssetTask(PropertyGroup):
     """Keeps track of some progress needed for asset bridge"""
     __reg_order__ = 0
@@ -70,13 +76,21 @@ class AssetTask(PropertyGroup):
             remove (bool): Whether to remove this task after cancelling."""
         self.cancelled = True
         self.finished = True
+        # Remove any downloads for this task that haven't started yet
+        scheduler.cancel(self.name)
         if self.progress:
             self.progress.cancel()
         if remove:
             self.remove()
 
     def new_progress(self, max_steps: int) -> Progress:
-        self.progress = Progress(max_steps, self, "progress_prop")
+        name = self.name
+        self.progress = Progress(
+            max_steps,
+            self,
+            "progress_prop",
+            get_data=lambda: get_ab_settings(bpy.context).tasks.get(name),
+        )
         return self.progress
 
     def update_progress(self, value: int, message: str = "") -> Progress:
@@ -197,10 +211,18 @@ class AssetBridgeWmSettings(PropertyGroup):
     def asset_quality_items(self, context):
         asset_list_item = self.selected_asset
         if asset_list_item:
+            levels = asset_list_item.ab_quality_levels
+            # The download states are cached, so this doesn't touch the disk
+            downloaded = tuple(asset_list_item.is_downloaded(level[0]) for level in levels)
+            key = (tuple(levels), downloaded)
+            cached = _quality_items.get(asset_list_item.ab_idname)
+            if cached and cached[0] == key:
+                return cached[1]
+
             items = []
-            for i, level in enumerate(asset_list_item.ab_quality_levels):
+            for i, level in enumerate(levels):
                 name, label, description = level
-                icon = "CHECKMARK" if asset_list_item.is_downloaded(level[0]) else "IMPORT"
+                icon = "CHECKMARK" if downloaded[i] else "IMPORT"
 
                 # If no name is found, should only happen due to a difficult asset.
                 if not name:
@@ -211,11 +233,14 @@ class AssetBridgeWmSettings(PropertyGroup):
 
                 # Avoid enum bug
                 items.append(_make_item(name, label, description, icon, i))
+            _quality_items[asset_list_item.ab_idname] = (key, items)
             return items
         return [("NONE", "None", "None")]
 
     def get_asset_quality(self):
-        maximum = len(self.asset_quality_items(None))
+        # There is one item per quality level, so there's no need to build the items just to count them
+        asset_list_item = self.selected_asset
+        maximum = len(asset_list_item.ab_quality_levels) if asset_list_item else 1
         quality = self.get("_asset_quality", 0)
         return min(quality, maximum - 1)
 
@@ -262,6 +287,11 @@ class AssetBridgeIDSettings(PropertyGroup):
     # Used to tell with data blocks are dummies that should be replaced with downloaded assets
     is_dummy: BoolProperty()
 
+    # Used to only update the dummy assets that have changed when the asset library is set up again
+    dummy_hash: StringProperty(description="A hash of the asset info that this dummy asset was created from")
+
+    dummy_preview_time: StringProperty(description="The modification time of the preview loaded for this dummy asset")
+
     idname: StringProperty()
 
     quality_level: StringProperty()
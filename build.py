@@ -38,7 +38,7 @@ def build_addon(version: str):
     files = [addon_dir.parent / f for f in files if "asset_bridge\\" in str(f)]
 
     cache_dir = addon_dir / "cache"
-    files += [f for f in cache_dir.iterdir() if f.suffix == ".json" and f.name not in {"prefs.json"}]
+    files += [f for f in cache_dir.iterdir() if f.suffix == ".cache"]
 
     previews_dir = cache_dir / "previews"
     files += [f for f in previews_dir.iterdir()]